@@ -0,0 +1,86 @@
+"""Бенчмарк індексу переглянутих новин: швидкість перевірки та пам'ять процесу (RSS).
+
+Запуск: python benchmarks/bench_dedup.py --entries 1000000
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dedup import SeenNewsIndex
+from seen_store import SqliteSeenNewsStore
+
+
+def rss_mb():
+    # ru_maxrss у Linux повертається в кілобайтах
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def timed_lookups(index, ids):
+    started = time.perf_counter()
+    for site, news_id in ids:
+        index.contains(site, news_id)
+    elapsed = time.perf_counter() - started
+    return len(ids) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--entries', type=int, default=1000000)
+    parser.add_argument('--sites', type=int, default=100)
+    parser.add_argument('--lookups', type=int, default=100000)
+    parser.add_argument('--capacity-per-site', type=int, default=10000)
+    parser.add_argument('--bloom', action='store_true', help='увімкнути фільтр Блума')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    store = SqliteSeenNewsStore(os.path.join(workdir, 'seen_news.db'))
+
+    started = time.perf_counter()
+    batch = 50000
+    for start in range(0, args.entries, batch):
+        for i in range(start, min(start + batch, args.entries)):
+            site = f"site{i % args.sites}"
+            link = f"https://example.com/{i}"
+            store.add(f"{site}:{link}", site, f"Article {i}", link)
+        store.commit()
+    fill_time = time.perf_counter() - started
+    rss_before = rss_mb()
+
+    started = time.perf_counter()
+    index = SeenNewsIndex(store, args.capacity_per_site, args.entries if args.bloom else 0)
+    build_time = time.perf_counter() - started
+
+    rng = random.Random(1)
+    # Гарячі записи: новини, що й досі висять на головній сторінці
+    hot = [rng.randrange(args.entries) for _ in range(min(args.lookups, 1000))]
+    hot_ids = [(f"site{i % args.sites}", f"site{i % args.sites}:https://example.com/{i}")
+               for i in (rng.choice(hot) for _ in range(args.lookups))]
+    cold_ids = [(f"site{i % args.sites}", f"site{i % args.sites}:https://example.com/{i}")
+                for i in (rng.randrange(args.entries) for _ in range(args.lookups))]
+    new_ids = [(f"site{i % args.sites}", f"site{i % args.sites}:https://example.com/new/{i}")
+               for i in range(args.lookups)]
+
+    results = {
+        'entries': args.entries,
+        'bloom': args.bloom,
+        'fill_seconds': round(fill_time, 2),
+        'index_build_seconds': round(build_time, 2),
+        'cold_lookups_per_second': round(timed_lookups(index, cold_ids)),
+        'hot_lookups_per_second': round(timed_lookups(index, hot_ids)),
+        'new_lookups_per_second': round(timed_lookups(index, new_ids)),
+        'rss_before_index_mb': round(rss_before, 1),
+        'rss_peak_mb': round(rss_mb(), 1),
+    }
+    store.close()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
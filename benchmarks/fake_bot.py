@@ -0,0 +1,47 @@
+import asyncio
+import random
+from aiogram.utils.exceptions import RetryAfter, BotBlocked
+
+
+# Імітація Bot для бенчмарків: нічого не надсилає, але може затримувати відповіді
+# і повертати помилки обмеження частоти або заблокованого чату
+class FakeBot:
+    def __init__(self, latency=0.0, flood_rate=0.0, blocked_rate=0.0, retry_after=1, seed=1):
+        self.latency = latency
+        self.flood_rate = flood_rate
+        self.blocked_rate = blocked_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.sent = 0
+        self.errors = 0
+
+    async def send_message(self, chat_id, text, **kwargs):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        else:
+            await asyncio.sleep(0)
+
+        roll = self.random.random()
+        if roll < self.blocked_rate:
+            self.errors += 1
+            raise BotBlocked('Forbidden: bot was blocked by the user')
+        if roll < self.blocked_rate + self.flood_rate:
+            self.errors += 1
+            raise RetryAfter(self.retry_after)
+        self.sent += 1
+
+
+# Імітація SubscribersManager, щоб розсилка не перезаписувала справжній файл підписників
+class FakeSubscribers:
+    def __init__(self, count):
+        self.subscribers = list(range(1, count + 1))
+        self.removed = 0
+
+    def get_subscribers(self):
+        return self.subscribers
+
+    def mark_blocked(self, user_id):
+        self.removed += 1
+
+    def record_delivery(self, user_id):
+        pass
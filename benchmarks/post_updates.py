@@ -0,0 +1,88 @@
+"""Надсилає записані (або синтетичні) оновлення Telegram на вебхук бота.
+
+Бот запускається локально з BOT_MODE = 'webhook' і порожнім WEBHOOK_HOST, тож вебхук
+у Telegram не реєструється. Файл оновлень - JSON-рядки, по одному Update на рядок.
+
+Запуск:
+    python benchmarks/post_updates.py --url http://127.0.0.1:8080/webhook --file updates.jsonl
+    python benchmarks/post_updates.py --url http://127.0.0.1:8080/webhook --synthetic 10000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import aiohttp
+
+
+def synthetic_updates(count, text):
+    # Хвиля натискань /start від різних користувачів, як після поста в каналі
+    now = int(time.time())
+    for i in range(count):
+        user = {'id': 1000000 + i, 'is_bot': False, 'first_name': f'User {i}'}
+        yield {
+            'update_id': i + 1,
+            'message': {
+                'message_id': i + 1,
+                'from': user,
+                'chat': {'id': user['id'], 'type': 'private', 'first_name': user['first_name']},
+                'date': now,
+                'text': text,
+            }
+        }
+
+
+def load_updates(file_path):
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def post_all(url, updates, concurrency, secret):
+    headers = {'X-Telegram-Bot-Api-Secret-Token': secret} if secret else {}
+    latencies = []
+    statuses = {}
+    queue = asyncio.Queue()
+    for update in updates:
+        queue.put_nowait(update)
+
+    async def worker(session):
+        while not queue.empty():
+            update = queue.get_nowait()
+            started = time.perf_counter()
+            async with session.post(url, json=update, headers=headers) as response:
+                await response.read()
+                statuses[response.status] = statuses.get(response.status, 0) + 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    async with aiohttp.ClientSession() as session:
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'updates': len(latencies),
+        'statuses': statuses,
+        'seconds': round(elapsed, 3),
+        'updates_per_second': round(len(latencies) / elapsed, 1) if elapsed else 0,
+        'latency_p50_ms': round(latencies[len(latencies) // 2] * 1000, 2) if latencies else 0,
+        'latency_p99_ms': round(latencies[int(len(latencies) * 0.99)] * 1000, 2) if latencies else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--url', default='http://127.0.0.1:8080/webhook')
+    parser.add_argument('--file', help='JSON-рядки з записаними оновленнями')
+    parser.add_argument('--synthetic', type=int, default=1000, help='кількість синтетичних оновлень, якщо немає --file')
+    parser.add_argument('--text', default='📰 Підписатися на новини', help='текст синтетичних повідомлень')
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--secret', help='WEBHOOK_SECRET бота')
+    args = parser.parse_args()
+
+    updates = load_updates(args.file) if args.file else list(synthetic_updates(args.synthetic, args.text))
+    print(json.dumps(asyncio.run(post_all(args.url, updates, args.concurrency, args.secret)), indent=2))
+
+
+if __name__ == '__main__':
+    main()
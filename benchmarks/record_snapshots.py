@@ -0,0 +1,54 @@
+"""Зберігає поточні головні сторінки сайтів із sites_config.json для офлайн-бенчмарків.
+
+Запуск: python benchmarks/record_snapshots.py [--config sites_config.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+
+import aiohttp
+
+SNAPSHOTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'snapshots')
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+}
+
+
+def snapshot_name(site_name):
+    return re.sub(r'[^a-z0-9]+', '_', site_name.lower()).strip('_')
+
+
+async def record(site_config, session):
+    name = snapshot_name(site_config['name'])
+    async with session.get(site_config['url'], headers=HEADERS) as response:
+        body = await response.read()
+    with open(os.path.join(SNAPSHOTS_DIR, f"{name}.html"), 'wb') as f:
+        f.write(body)
+    with open(os.path.join(SNAPSHOTS_DIR, f"{name}.json"), 'w', encoding='utf-8') as f:
+        json.dump(site_config, f, ensure_ascii=False, indent=2)
+    print(f"{site_config['name']}: {len(body)} байт")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--config', default='sites_config.json')
+    args = parser.parse_args()
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        sites = json.load(f)
+
+    os.makedirs(SNAPSHOTS_DIR, exist_ok=True)
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30)) as session:
+        for site_config in sites:
+            try:
+                await record(site_config, session)
+            except Exception as e:
+                print(f"{site_config['name']}: помилка {e}")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,329 @@
+"""Офлайн-бенчмарк перевірки сайтів і розсилки.
+
+Локальний aiohttp-сервер віддає збережені сторінки з benchmarks/snapshots
+(див. record_snapshots.py) та синтетичні сторінки з потрібною кількістю новин.
+NewsParser.check_all_sites і DeliveryEngine працюють проти нього та FakeBot,
+тож мережа не потрібна. Потрібен config.py, як і для запуску бота.
+
+Запуск:
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --output new.json --compare results.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+SNAPSHOTS_DIR = os.path.join(BENCH_DIR, 'snapshots')
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from aiohttp import web
+
+from extraction import compile_site, get_backend, available_backends
+from fake_bot import FakeBot, FakeSubscribers
+
+
+def synthetic_page(items, offset=0):
+    rows = []
+    for i in range(offset, offset + items):
+        rows.append(
+            f'<article class="bench-item"><h2 class="bench-title">'
+            f'<a href="/post/{i}">Синтетична новина номер {i} про дизайн та технології</a></h2>'
+            f'<p class="bench-summary">Короткий опис новини {i}. ' + 'Lorem ipsum dolor sit amet. ' * 5 +
+            '</p></article>'
+        )
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>Bench</title></head><body>'
+        '<header><nav><a href="/">Головна</a></nav></header><main class="feed">'
+        + ''.join(rows) +
+        '</main><footer>© Bench</footer></body></html>'
+    ).encode('utf-8')
+
+
+def synthetic_config(name, url):
+    return {
+        'name': name,
+        'url': url,
+        'selector': '.bench-item .bench-title a',
+        'title_attr': '',
+        'link_attr': 'href',
+        'base_url': url.rsplit('/', 1)[0]
+    }
+
+
+def load_snapshots():
+    snapshots = []
+    if not os.path.isdir(SNAPSHOTS_DIR):
+        return snapshots
+    for file_name in sorted(os.listdir(SNAPSHOTS_DIR)):
+        if not file_name.endswith('.html'):
+            continue
+        name = file_name[:-5]
+        config_path = os.path.join(SNAPSHOTS_DIR, f"{name}.json")
+        if not os.path.exists(config_path):
+            continue
+        with open(os.path.join(SNAPSHOTS_DIR, file_name), 'rb') as f:
+            body = f.read()
+        with open(config_path, 'r', encoding='utf-8') as f:
+            site_config = json.load(f)
+        snapshots.append((name, body, site_config))
+    return snapshots
+
+
+async def start_server(pages):
+    async def handler(request):
+        body = pages.get(request.match_info['name'])
+        if body is None:
+            return web.Response(status=404)
+        return web.Response(body=body, content_type='text/html', charset='utf-8')
+
+    app = web.Application()
+    app.router.add_get('/{name}', handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def percentiles(values):
+    ordered = sorted(values)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    return {
+        'p50': round(pick(0.5), 4),
+        'p90': round(pick(0.9), 4),
+        'p99': round(pick(0.99), 4),
+        'max': round(ordered[-1], 4),
+    }
+
+
+def bench_parse(pages, site_configs, repeat):
+    """Чистий час розбору сторінок кожним доступним бекендом, без мережі."""
+    results = {}
+    for backend_name in available_backends():
+        backend = get_backend(backend_name)
+        plans = [(compile_site(site_config, backend), pages[name]) for name, site_config in site_configs]
+        items = 0
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for plan, body in plans:
+                found, _ = plan.extract(body.decode('utf-8', errors='replace'))
+                items += found
+        elapsed = time.perf_counter() - started
+        results[backend_name] = {
+            'pages_per_second': round(repeat * len(plans) / elapsed, 1),
+            'items_per_second': round(items / elapsed, 1),
+        }
+    return results
+
+
+async def bench_check(main, workdir, pages, site_configs, cycles):
+    parser = main.NewsParser(
+        sites_config_file=os.path.join(workdir, 'sites_config.json'),
+        seen_news_file=os.path.join(workdir, 'seen_news.json'),
+        validators_file=os.path.join(workdir, 'site_validators.json'),
+        seen_db_file=os.path.join(workdir, 'seen_news.db'),
+        html_backend=main.HTML_BACKEND,
+        parse_executor=main.PARSE_EXECUTOR,
+        parse_workers=main.PARSE_WORKERS,
+        http_options=main.HTTP_OPTIONS,
+        # Синтетичні заголовки відрізняються лише номером: фільтр повторів не має їх відкидати
+        near_duplicate_window=0
+    )
+    parser.sites_config = [site_config for _, site_config in site_configs]
+    parser.site_plans = {}
+    for site_config in parser.sites_config:
+        parser.compile_plan(site_config)
+
+    total_bytes = sum(len(pages[name]) for name, _ in site_configs)
+    latencies = []
+    new_articles = []
+    for _ in range(cycles):
+        # Скидаємо валідатори, щоб кожен цикл завантажував і розбирав сторінки повністю
+        parser.site_validators.clear()
+        started = time.perf_counter()
+        articles = await parser.check_all_sites()
+        latencies.append(time.perf_counter() - started)
+        new_articles.append(len(articles))
+    await parser.close()
+
+    steady = latencies[1:] or latencies
+    return {
+        'sites': len(site_configs),
+        'bytes_per_cycle': total_bytes,
+        'first_cycle_seconds': round(latencies[0], 4),
+        'first_cycle_new_articles': new_articles[0],
+        'cycle_latency_seconds': percentiles(steady),
+        'pages_per_second': round(len(site_configs) / (sum(steady) / len(steady)), 1),
+        'megabytes_per_second': round(total_bytes / 1e6 / (sum(steady) / len(steady)), 2),
+    }
+
+
+async def bench_fanout(subscriber_counts, messages, concurrency, latency):
+    from delivery import DeliveryEngine
+
+    results = {}
+    texts = [f"📰 <b>Bench</b>\n\nНовина {i}" for i in range(messages)]
+    for count in subscriber_counts:
+        bot = FakeBot(latency=latency)
+        subscribers = FakeSubscribers(count)
+        # Ліміти Telegram вимкнено: вимірюємо власні накладні витрати розсилки
+        engine = DeliveryEngine(bot, subscribers, concurrency=concurrency, global_rate=10 ** 9,
+                                per_chat_interval=0)
+        stats = await engine.deliver({user_id: texts for user_id in subscribers.get_subscribers()})
+        results[str(count)] = {
+            'messages': stats['sent'],
+            'seconds': round(stats['elapsed'], 3),
+            'messages_per_second': round(stats['rate'], 1),
+        }
+    return results
+
+
+def bench_subscribe(workdir, subscriber_counts, batch):
+    """Швидкість підписки при різній кількості наявних підписників; збереження раз на batch підписок."""
+    from subscriber_store import open_subscriber_store
+
+    results = {}
+    for backend in ('json', 'sqlite'):
+        results[backend] = {}
+        for count in subscriber_counts:
+            prefix = os.path.join(workdir, f"subscribers_{backend}_{count}")
+            store = open_subscriber_store(backend, f"{prefix}.json", f"{prefix}.db")
+            for user_id in range(count):
+                store.add(user_id)
+            store.commit()
+
+            started = time.perf_counter()
+            for user_id in range(count, count + batch):
+                store.add(user_id)
+            store.commit()
+            elapsed = time.perf_counter() - started
+            store.close()
+            results[backend][str(count)] = {'subscribes_per_second': round(batch / elapsed, 1)}
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def flatten(data, prefix=''):
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(old, new):
+    old_flat = flatten(old['results'])
+    new_flat = flatten(new['results'])
+    print(f"{'метрика':<60} {'було':>12} {'стало':>12} {'зміна':>8}")
+    for name, value in new_flat.items():
+        previous = old_flat.get(name)
+        if previous is None:
+            continue
+        change = f"{(value - previous) / previous * 100:+.1f}%" if previous else ''
+        print(f"{name:<60} {previous:>12} {value:>12} {change:>8}")
+
+
+async def run(args):
+    snapshots = load_snapshots()
+    pages = {}
+    site_configs = []
+    for name, body, site_config in snapshots:
+        pages[name] = body
+
+    for i in range(args.synthetic_sites):
+        pages[f"synthetic{i}"] = synthetic_page(args.items, offset=i * args.items)
+
+    runner, base_url = await start_server(pages)
+    try:
+        for name, _, site_config in snapshots:
+            site_configs.append((name, dict(site_config, url=f"{base_url}/{name}")))
+        for i in range(args.synthetic_sites):
+            name = f"synthetic{i}"
+            site_configs.append((name, synthetic_config(f"Synthetic {i}", f"{base_url}/{name}")))
+
+        # main створює файли поруч із поточною текою, тому імпортуємо його з тимчасової
+        workdir = tempfile.mkdtemp()
+        os.chdir(workdir)
+        import main
+        logging.getLogger().setLevel(logging.WARNING)
+
+        results = {
+            'parse': bench_parse(pages, site_configs, args.parse_repeat),
+            'check': await bench_check(main, workdir, pages, site_configs, args.cycles),
+            'fanout': await bench_fanout(args.subscribers, args.messages, args.concurrency, args.send_latency),
+            'subscribe': bench_subscribe(workdir, args.subscribers, args.subscribe_batch),
+        }
+    finally:
+        await runner.cleanup()
+
+    results['peak_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return {
+        'meta': {
+            'revision': git_revision(),
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'snapshots': [name for name, _, _ in snapshots],
+            'args': vars(args),
+        },
+        'results': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--synthetic-sites', type=int, default=20)
+    parser.add_argument('--items', type=int, default=1000, help='новин на синтетичній сторінці')
+    parser.add_argument('--cycles', type=int, default=10)
+    parser.add_argument('--parse-repeat', type=int, default=3)
+    parser.add_argument('--subscribers', type=int, nargs='+', default=[10, 1000, 100000])
+    parser.add_argument('--messages', type=int, default=3, help='повідомлень кожному підписнику')
+    parser.add_argument('--concurrency', type=int, default=30)
+    parser.add_argument('--send-latency', type=float, default=0.0, help='затримка FakeBot, с')
+    parser.add_argument('--subscribe-batch', type=int, default=1000, help='підписок між збереженнями')
+    parser.add_argument('--output', help='куди зберегти результати у JSON')
+    parser.add_argument('--compare', help='попередній JSON для порівняння')
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output) if args.output else None
+    previous = os.path.abspath(args.compare) if args.compare else None
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    print(text)
+
+    if previous:
+        with open(previous, 'r', encoding='utf-8') as f:
+            compare(json.load(f), report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""Окремі воркери перевірки сайтів без aiogram.
+
+Сайти з sites_config.json розподіляються між воркерами консистентним хешуванням назви,
+нові статті передаються боту через таблицю incoming_articles в outbox.db.
+Бот у цьому разі запускається з RUN_MODE = 'bot' у config.py.
+
+Запуск:
+    python checker.py --shards 4              # чотири процеси-воркери
+    python checker.py --shards 4 --shard 2    # лише один воркер (наприклад, під systemd)
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import signal
+
+from checking import NewsParser, check_news_task
+from outbox import ArticleQueue
+from scheduler import SiteScheduler
+from sharding import HashRing
+import metrics
+from logging_setup import setup_logging
+from settings import *
+
+
+async def run_checker(shard, shards):
+    ring = HashRing(shards)
+    # Кожен воркер зберігає валідатори та стрічки у власних файлах, щоб не перезаписувати чужі
+    news_parser = NewsParser(
+        validators_file=f'site_validators.{shard}.json',
+        feeds_file=f'site_feeds.{shard}.json',
+        html_backend=HTML_BACKEND,
+        parse_executor=PARSE_EXECUTOR,
+        parse_workers=PARSE_WORKERS,
+        seen_backend=SEEN_NEWS_BACKEND,
+        seen_ttl_days=SEEN_NEWS_TTL_DAYS,
+        dedup_capacity_per_site=DEDUP_CAPACITY_PER_SITE,
+        dedup_bloom_capacity=DEDUP_BLOOM_CAPACITY,
+        http_options=HTTP_OPTIONS,
+        health_options=HEALTH_OPTIONS,
+        max_bytes=FETCH_MAX_BYTES,
+        near_duplicate_distance=NEAR_DUPLICATE_DISTANCE,
+        near_duplicate_window=NEAR_DUPLICATE_WINDOW,
+        feed_max_failures=FEED_MAX_FAILURES
+    )
+    site_scheduler = SiteScheduler(
+        CHECK_INTERVAL,
+        min_interval=SCHEDULER_MIN_INTERVAL,
+        max_interval=SCHEDULER_MAX_INTERVAL,
+        articles_per_check=SCHEDULER_ARTICLES_PER_CHECK,
+        history_days=SCHEDULER_HISTORY_DAYS
+    )
+    queue = ArticleQueue()
+
+    def owned_sites():
+        return {site_config['name'] for site_config in news_parser.sites_config
+                if ring.shard_for(site_config['name']) == shard}
+
+    sites = owned_sites()
+    logging.info("Воркер %d/%d: %d сайтів", shard, shards, len(sites))
+
+    metrics_runner = None
+    if METRICS_PORT:
+        metrics_runner = await metrics.start_metrics_server(METRICS_HOST, METRICS_PORT + 1 + shard)
+
+    task = asyncio.create_task(check_news_task(news_parser, site_scheduler, queue.push, sorted(sites)))
+    try:
+        while True:
+            await asyncio.sleep(CONFIG_RELOAD_INTERVAL)
+            if task.done():
+                task.result()
+            # Сайти додаються й видаляються через бота, тож стежимо за змінами файлу налаштувань
+            if news_parser.reload_sites_config():
+                current = owned_sites()
+                site_scheduler.add_sites(current - sites)
+                for site_name in sites - current:
+                    site_scheduler.remove(site_name)
+                sites = current
+    finally:
+        task.cancel()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        await news_parser.close()
+        queue.close()
+
+
+def run_worker(shard, shards):
+    setup_logging(LOG_LEVEL, LOG_FILE, LOG_JSON)
+
+    async def main():
+        # SIGTERM (systemd, docker stop) завершує воркер так само акуратно, як Ctrl+C
+        current = asyncio.current_task()
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, current.cancel)
+        try:
+            await run_checker(shard, shards)
+        except asyncio.CancelledError:
+            logging.info("Воркер %d зупинено", shard)
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--shards', type=int, default=1, help='загальна кількість воркерів')
+    parser.add_argument('--shard', type=int, help='номер воркера (0..shards-1); без нього запускаються всі')
+    args = parser.parse_args()
+    # JSON-сховище переписується цілком, тож кілька воркерів затирали б новини один одного
+    if SEEN_NEWS_BACKEND == 'json' and args.shards > 1:
+        parser.error("SEEN_NEWS_BACKEND = 'json' підтримує лише один воркер; використовуйте 'sqlite'")
+
+    if args.shard is not None:
+        run_worker(args.shard, args.shards)
+        return
+
+    processes = [multiprocessing.Process(target=run_worker, args=(shard, args.shards), name=f'checker-{shard}')
+                 for shard in range(args.shards)]
+    for process in processes:
+        process.start()
+    # Зупинка батьківського процесу зупиняє й воркерів
+    signal.signal(signal.SIGTERM, lambda *_: [process.terminate() for process in processes])
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,690 @@
+import asyncio
+import aiohttp
+import json
+import os
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from datetime import datetime, timedelta
+import logging
+from extraction import compile_site, get_backend, extract_page_articles
+from feeds import discover_feed, extract_feed_articles
+from fetching import ACCEPT_ENCODING, read_body, decode_body
+from seen_store import open_seen_store
+from subscriber_store import write_json_atomic
+from dedup import SeenNewsIndex, NearDuplicateIndex, canonical_url, title_key
+from health import SiteHealth
+import metrics
+from logging_setup import setup_worker_logging
+
+# Перевірка сайтів без залежності від aiogram: використовується і ботом, і окремими воркерами checker.py
+
+
+# Позначка того, що сторінка не змінилася з попередньої перевірки
+NOT_MODIFIED = object()
+
+
+# Невдалий запит: хибне значення, як і None раніше, але з кодом відповіді (None - мережева помилка)
+class FetchError:
+    def __init__(self, status=None):
+        self.status = status
+
+    def __bool__(self):
+        return False
+
+
+def commit_entries(current, saved, keys=None):
+    """Переносить записи keys (або всі) з current у saved. Повертає True, якщо saved змінився."""
+    if keys is None:
+        if current == saved:
+            return False
+        saved.clear()
+        saved.update(current)
+        return True
+    changed = False
+    for key in keys:
+        if key in current:
+            if saved.get(key) != current[key]:
+                saved[key] = current[key]
+                changed = True
+        elif key in saved:
+            del saved[key]
+            changed = True
+    return changed
+
+
+def restore_entries(current, saved, keys):
+    """Повертає записи keys у current до збережених у saved значень."""
+    for key in keys:
+        if key in saved:
+            current[key] = saved[key]
+        else:
+            current.pop(key, None)
+
+
+# Клас для парсингу новин
+class NewsParser:
+    def __init__(self, sites_config_file='sites_config.json', seen_news_file='seen_news.json',
+                 validators_file='site_validators.json', html_backend='auto',
+                 parse_executor='thread', parse_workers=4,
+                 seen_backend='sqlite', seen_db_file='seen_news.db', seen_ttl_days=0,
+                 dedup_capacity_per_site=10000, dedup_bloom_capacity=0, http_options=None,
+                 health_options=None, feeds_file='site_feeds.json', max_bytes=5 * 1024 * 1024,
+                 near_duplicate_distance=1, near_duplicate_window=0, feed_max_failures=3):
+        self.sites_config_file = sites_config_file
+        self.seen_news_file = seen_news_file
+        self.seen_ttl_days = seen_ttl_days
+        self.last_purge = None
+        self.validators_file = validators_file
+        self.backend = get_backend(html_backend)
+        # Пул для розбору HTML поза циклом подій; створюється при першому використанні
+        self.parse_executor = parse_executor
+        self.parse_workers = parse_workers
+        self.executor = None
+        # Довготривала HTTP-сесія; створюється в циклі подій при першому запиті
+        self.http_options = http_options or {}
+        # Ліміт розміру відповіді за замовчуванням; для сайту можна задати max_bytes у sites_config.json
+        self.max_bytes = max_bytes
+        self.session = None
+        # Стан доступності кожного сайту (помилки, затримки, запобіжник)
+        self.health_options = health_options or {}
+        self.site_health = {}
+        self.sites_config_mtime = None
+        self.sites_config = self.load_sites_config()
+        if os.path.exists(self.sites_config_file):
+            self.sites_config_mtime = os.path.getmtime(self.sites_config_file)
+        # Плани вилучення компілюються один раз при завантаженні або додаванні сайту
+        self.site_plans = {}
+        for site_config in self.sites_config:
+            self.compile_plan(site_config)
+        # Сховище переглянутих новин; старий seen_news.json мігрується в SQLite один раз
+        self.seen_news = open_seen_store(seen_backend, seen_news_file, seen_db_file)
+        # Компактний індекс відбитків для швидкої перевірки в циклі обробки статей
+        self.seen_index = SeenNewsIndex(self.seen_news, dedup_capacity_per_site, dedup_bloom_capacity)
+        # Та сама новина з іншого сайту або з іншою адресою (0 у вікні - перевірку вимкнено)
+        self.near_duplicates = None
+        if near_duplicate_window:
+            self.near_duplicates = NearDuplicateIndex(near_duplicate_distance, near_duplicate_window)
+        # ETag, Last-Modified і хеш останньої відповіді для кожного сайту
+        self.site_validators = self.load_validators()
+        # Знайдені RSS/Atom-стрічки сайтів (None - сайт не має стрічки)
+        self.feeds_file = feeds_file
+        self.site_feeds = self.load_feeds()
+        # Невдалі запити до знайдених автоматично стрічок поспіль
+        self.feed_max_failures = feed_max_failures
+        self.feed_failures = {}
+        # Записані на диск версії. Зміни сайту потрапляють у файл лише після публікації його статей,
+        # щоб після збою сторінку не вважали незмінною, а її статті - вже надісланими
+        self.saved_validators = dict(self.site_validators)
+        self.saved_feeds = dict(self.site_feeds)
+
+    def load_sites_config(self):
+        if os.path.exists(self.sites_config_file):
+            with open(self.sites_config_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        else:
+            # Стандартна конфігурація, якщо файл не існує
+            # https://ain.ua/  |  https://vctr.media/ua/   |  https://blog.hubspot.com/  |  https://cases.media/en
+            # |  https://www.komarov.design/
+
+            default_config = [
+                {
+                    'name': 'AIN.UA',
+                    'url': 'https://ain.ua/',
+                    'selector': '.post-link',
+                    'title_attr': '',
+                    'link_attr': 'href',
+                    'base_url': 'https://ain.ua'
+                },
+                {
+                    'name': 'Vector',
+                    'url': 'https://vctr.media/ua/',
+                    'selector': '.jeg_post_title a',
+                    'title_attr': '',
+                    'link_attr': 'href',
+                    'base_url': ''
+                },
+                {
+                    'name': 'HubSpot Blog',
+                    'url': 'https://blog.hubspot.com/',
+                    'selector': '.blog-card__title-link',
+                    'title_attr': '',
+                    'link_attr': 'href',
+                    'base_url': ''
+                },
+                {
+                    'name': 'Komarov Design',
+                    'url': 'https://www.komarov.design/',
+                    'selector': '.loop.inset-hover .secondary-button',
+                    'title_attr': '',
+                    'link_attr': 'href',
+                    'base_url': 'https://www.komarov.design'
+                }
+            ]
+            self.save_sites_config(default_config)
+            return default_config
+
+    def save_sites_config(self, config=None):
+        if config is None:
+            config = self.sites_config
+        # Файл можуть одночасно читати воркери перевірки, тому підміняємо його атомарно
+        write_json_atomic(self.sites_config_file, config, indent=2)
+        self.sites_config_mtime = os.path.getmtime(self.sites_config_file)
+
+    def reload_sites_config(self):
+        """Перечитує sites_config.json, якщо його змінив інший процес. Повертає True, якщо щось змінилося."""
+        try:
+            mtime = os.path.getmtime(self.sites_config_file)
+        except OSError:
+            return False
+        if mtime == self.sites_config_mtime:
+            return False
+        self.sites_config_mtime = mtime
+        sites_config = self.load_sites_config()
+        if sites_config == self.sites_config:
+            return False
+
+        names = {site_config['name'] for site_config in sites_config}
+        for site_config in self.sites_config:
+            if site_config['name'] not in names:
+                self.site_plans.pop(site_config['name'], None)
+                self.seen_index.remove_site(site_config['name'])
+        old_configs = {site_config['name']: site_config for site_config in self.sites_config}
+        self.sites_config = sites_config
+        for site_config in sites_config:
+            if old_configs.get(site_config['name']) != site_config:
+                self.compile_plan(site_config)
+        logging.info("Налаштування сайтів перечитано: %d сайтів", len(sites_config))
+        return True
+
+    def compile_plan(self, site_config):
+        try:
+            self.site_plans[site_config['name']] = compile_site(site_config, self.backend)
+        except Exception as e:
+            logging.error("Не вдалося скомпілювати налаштування сайту %s: %s", site_config.get('name'), e)
+
+    def add_site(self, site_config):
+        self.sites_config.append(site_config)
+        self.save_sites_config()
+        self.compile_plan(site_config)
+
+    def remove_site(self, site_name):
+        self.sites_config = [site for site in self.sites_config if site['name'] != site_name]
+        self.save_sites_config()
+        self.site_plans.pop(site_name, None)
+        self.site_health.pop(site_name, None)
+        self.seen_index.remove_site(site_name)
+        self.site_validators.pop(f"{site_name}#feed", None)
+        self.site_validators.pop(site_name, None)
+        self.site_feeds.pop(site_name, None)
+        self.site_feeds.pop(f"{site_name}#source", None)
+        self.feed_failures.pop(site_name, None)
+        self.save_validators(site_name)
+        self.save_feeds(site_name)
+        return len(self.sites_config)
+
+    def save_seen_news(self, site_name=None):
+        self.seen_news.commit(site_name)
+
+        # Видалення старих записів не частіше ніж раз на добу
+        if self.seen_ttl_days and (self.last_purge is None or datetime.now() - self.last_purge > timedelta(days=1)):
+            self.last_purge = datetime.now()
+            removed = self.seen_news.purge(datetime.now() - timedelta(days=self.seen_ttl_days))
+            if removed:
+                logging.info("Видалено %d застарілих записів про новини", removed)
+
+    def get_health(self, site_name):
+        health = self.site_health.get(site_name)
+        if health is None:
+            health = self.site_health[site_name] = SiteHealth(**self.health_options)
+        return health
+
+    def load_validators(self):
+        if os.path.exists(self.validators_file):
+            with open(self.validators_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {}
+
+    def save_validators(self, site_name=None):
+        keys = None if site_name is None else (site_name, f"{site_name}#feed")
+        if commit_entries(self.site_validators, self.saved_validators, keys):
+            write_json_atomic(self.validators_file, self.saved_validators, indent=2)
+
+    def load_feeds(self):
+        if os.path.exists(self.feeds_file):
+            with open(self.feeds_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {}
+
+    def save_feeds(self, site_name=None):
+        keys = None if site_name is None else (site_name, f"{site_name}#source")
+        if commit_entries(self.site_feeds, self.saved_feeds, keys):
+            write_json_atomic(self.feeds_file, self.saved_feeds, indent=2)
+
+    async def fetch_page(self, session, site_name, url, validators_key=None, max_bytes=None, end_marker=None,
+                         conditional=True):
+        try:
+            headers = {
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+                'Accept-Language': 'uk-UA,uk;q=0.8,en-US;q=0.5,en;q=0.3',
+                'Accept-Encoding': ACCEPT_ENCODING,
+            }
+
+            # Умовний запит: валідатори використовуємо лише якщо URL сайту не змінювався.
+            # Для наступних сторінок стрічки (conditional=False) валідатори не потрібні
+            if validators_key is None:
+                validators_key = site_name
+            validators = self.site_validators.get(validators_key) if conditional else None
+            if validators and validators.get('url') != url:
+                validators = None
+            if validators:
+                if validators.get('etag'):
+                    headers['If-None-Match'] = validators['etag']
+                if validators.get('last_modified'):
+                    headers['If-Modified-Since'] = validators['last_modified']
+
+            started = time.perf_counter()
+            async with session.get(url, headers=headers) as response:
+                metrics.FETCH_RESPONSES.inc(site=site_name, status=response.status)
+                if response.status == 304 and validators:
+                    metrics.FETCH_SECONDS.observe(time.perf_counter() - started, site=site_name)
+                    logging.debug("Сторінка %s не змінилася (304)", url)
+                    return NOT_MODIFIED
+                if response.status == 200:
+                    # Читаємо потоково з обмеженням розміру; декодуємо лише змінену сторінку
+                    body = await read_body(response, max_bytes or self.max_bytes, end_marker)
+                    metrics.FETCH_SECONDS.observe(time.perf_counter() - started, site=site_name)
+                    metrics.FETCH_BYTES.inc(len(body), site=site_name)
+                    digest = hashlib.sha256(body).hexdigest()
+                    unchanged = bool(validators) and validators.get('digest') == digest
+
+                    if conditional:
+                        self.site_validators[validators_key] = {
+                            'url': url,
+                            'etag': response.headers.get('ETag'),
+                            'last_modified': response.headers.get('Last-Modified'),
+                            'digest': digest
+                        }
+
+                    if unchanged:
+                        logging.debug("Вміст сторінки %s не змінився", url)
+                        return NOT_MODIFIED
+                    return decode_body(body, response.charset)
+                else:
+                    logging.warning("Помилка при отриманні сторінки %s: %s", url, response.status)
+                    self.get_health(site_name).record_failure(f"HTTP {response.status}")
+                    return FetchError(response.status)
+        except Exception as e:
+            logging.error("Виникла помилка при запиті до %s: %s", url, e)
+            metrics.FETCH_RESPONSES.inc(site=site_name, status=type(e).__name__)
+            self.get_health(site_name).record_failure(str(e) or type(e).__name__)
+            return FetchError()
+
+    def get_executor(self):
+        if self.executor is None:
+            if self.parse_executor == 'process':
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.parse_workers,
+                    initializer=setup_worker_logging,
+                    initargs=(logging.getLogger().level,)
+                )
+            elif self.parse_executor == 'thread':
+                self.executor = ThreadPoolExecutor(max_workers=self.parse_workers,
+                                                   thread_name_prefix='parser')
+        return self.executor
+
+    def get_session(self):
+        if self.session is None or self.session.closed:
+            options = self.http_options
+            connector = aiohttp.TCPConnector(
+                limit=options.get('limit', 100),
+                limit_per_host=options.get('limit_per_host', 2),
+                ttl_dns_cache=options.get('dns_cache_ttl', 300),
+                keepalive_timeout=options.get('keepalive_timeout', 60)
+            )
+            timeout = aiohttp.ClientTimeout(
+                total=options.get('total_timeout', 30),
+                connect=options.get('connect_timeout', 5),
+                sock_read=options.get('read_timeout', 15)
+            )
+            self.session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self.session
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        self.seen_news.close()
+
+    async def run_in_pool(self, func, *args):
+        executor = self.get_executor()
+        if executor is None:
+            return func(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, func, *args)
+
+    async def extract_page(self, plan, html, page_url):
+        if self.get_executor() is None:
+            return plan.extract_page(html, page_url)
+
+        # У пул передаємо лише конфігурацію сайту та сторінку, план компілюється у воркері
+        return await self.run_in_pool(extract_page_articles, plan.site_config, self.backend.name, html, page_url)
+
+    def is_seen(self, site_name, article):
+        # Історія до нормалізації посилань зберігає їх як є, тож перевіряємо обидва варіанти
+        link = canonical_url(article['link'])
+        if self.seen_index.contains(site_name, f"{site_name}:{link}"):
+            return True
+        return link != article['link'] and self.seen_index.contains(site_name, f"{site_name}:{article['link']}")
+
+    def collect_new_articles(self, site_name, found, articles):
+        new_articles = []
+
+        duplicates = 0
+
+        for article in articles:
+            # Перевірка, чи бачили ми цю новину раніше
+            if self.is_seen(site_name, article):
+                continue
+
+            # Створення унікального ідентифікатора новини з канонічного посилання
+            link = canonical_url(article['link'])
+            news_id = f"{site_name}:{link}"
+            self.seen_index.add(news_id, site_name, article['title'], article['link'])
+            if self.near_duplicates is not None:
+                reason = self.near_duplicates.check_and_add(link, article['title'], site_name)
+                if reason is not None:
+                    duplicates += 1
+                    metrics.DUPLICATES.inc(site=site_name, reason=reason)
+                    logging.debug("Пропущено повтор (%s): %s з %s", reason, article['title'], site_name)
+                    continue
+
+            article['first_seen'] = time.time()
+            new_articles.append(article)
+            metrics.NEW_ARTICLES.inc(site=site_name)
+            logging.debug("Додано нову статтю: %s з %s", article['title'], site_name)
+
+        # Один підсумковий запис на сайт замість записів про кожен елемент
+        logging.info("Сайт %s: знайдено %d елементів, нових статей %d, повторів %d",
+                     site_name, found, len(new_articles), duplicates)
+        return new_articles
+
+    async def parse_feed(self, session, plan, feed_url):
+        """Нові статті з RSS/Atom-стрічки або None, якщо стрічкою скористатися не вдалося."""
+        site_name = plan.site_name
+        validators_key = f"{site_name}#feed"
+        data = await self.fetch_page(session, site_name, feed_url, validators_key=validators_key,
+                                     max_bytes=plan.site_config.get('max_bytes'))
+        if data is NOT_MODIFIED:
+            self.feed_failures.pop(site_name, None)
+            self.get_health(site_name).record_not_modified()
+            return []
+        if not data:
+            self.feed_failed(plan, feed_url, data.status)
+            return None
+
+        try:
+            with metrics.Timer(metrics.PARSE_SECONDS, site=site_name):
+                found, articles = await self.run_in_pool(extract_feed_articles, plan.site_config, data)
+        except Exception as e:
+            logging.warning("Стрічку %s сайту %s не вдалося розібрати: %s", feed_url, site_name, e)
+            found = 0
+        metrics.ITEMS_MATCHED.inc(found, site=site_name)
+
+        if not found:
+            self.site_validators.pop(validators_key, None)
+            # Знайдену автоматично зламану стрічку забуваємо одразу
+            self.feed_failed(plan, feed_url, forget=True)
+            return None
+
+        self.feed_failures.pop(site_name, None)
+        self.get_health(site_name).record_success()
+        if self.switch_source(site_name, 'feed'):
+            return self.collect_switched(site_name, found, articles)
+        return self.collect_new_articles(site_name, found, articles)
+
+    def switch_source(self, site_name, source):
+        """Запам'ятовує, звідки прочитано статті сайту ('feed' або 'html'). Повертає True, якщо сайт
+        з історією щойно перейшов на інше джерело: посилання у стрічці й на сторінці часто різні,
+        тож статті нового джерела звіряються з історією сайту за заголовками (див. collect_switched)."""
+        source_key = f"{site_name}#source"
+        # До появи стрічок статті читалися лише з HTML
+        previous = self.site_feeds.get(source_key, 'html')
+        self.site_feeds[source_key] = source
+        if source == previous or not self.seen_news.count_since(site_name, datetime.min):
+            return False
+        logging.info("Сайт %s: статті тепер читаються з %s", site_name, 'стрічки' if source == 'feed' else 'HTML')
+        return True
+
+    def collect_switched(self, site_name, found, articles):
+        """Статті щойно зміненого джерела: усі запам'ятовуються, а новими вважаються лише ті,
+        що стоять вище за першу статтю з уже відомим заголовком (стрічки й сторінки йдуть
+        від нових до старих). Без жодного знайомого заголовка новин не розсилаємо взагалі,
+        щоб не надіслати підписникам увесь архів стрічки."""
+        known = {title_key(title) for title in self.seen_news.recent_titles(site_name, 200)}
+        fresh = 0
+        for i, article in enumerate(articles):
+            if title_key(article['title']) in known:
+                fresh = i
+                break
+        fresh_ids = {id(article) for article in articles[:fresh]}
+        new_articles = [article for article in self.collect_new_articles(site_name, found, articles)
+                        if id(article) in fresh_ids]
+        logging.info("Сайт %s: після зміни джерела нових статей %d, решту позначено переглянутими",
+                     site_name, len(new_articles))
+        return new_articles
+
+    def feed_failed(self, plan, feed_url, status=None, forget=False):
+        """Забуває знайдену автоматично стрічку після 4xx або feed_max_failures невдач поспіль,
+        щоб кожна перевірка не платила за зайвий запит перед CSS-селектором."""
+        site_name = plan.site_name
+        if plan.site_config.get('feed_url') or self.site_feeds.get(site_name) != feed_url:
+            return
+        failures = self.feed_failures.get(site_name, 0) + 1
+        # 408 і 429 - тимчасові відмови, а не відсутність стрічки
+        if forget or (status is not None and 400 <= status < 500 and status not in (408, 429)) \
+                or failures >= self.feed_max_failures:
+            self.feed_failures.pop(site_name, None)
+            self.site_feeds[site_name] = None
+            logging.info("Забуваємо стрічку %s сайту %s, використовуємо CSS-селектор", feed_url, site_name)
+        else:
+            self.feed_failures[site_name] = failures
+
+    async def crawl_pages(self, session, plan, html):
+        """Асинхронний генератор (found, articles) по сторінках стрічки сайту.
+
+        Перша сторінка вже завантажена; наступну (за next_page_selector) генератор завантажує
+        лише тоді, коли її попросять, і не більше max_pages сторінок загалом.
+        """
+        site_name = plan.site_name
+        page_url = plan.url
+        max_pages = plan.site_config.get('max_pages', 5) if plan.next_page_selector is not None else 1
+        visited = {page_url}
+        for page in range(max_pages):
+            if page:
+                html = await self.fetch_page(session, site_name, page_url,
+                                             max_bytes=plan.site_config.get('max_bytes'), conditional=False)
+                if not html:
+                    return
+            try:
+                with metrics.Timer(metrics.PARSE_SECONDS, site=site_name):
+                    found, articles, next_url = await self.extract_page(plan, html, page_url)
+            except Exception as e:
+                if not page:
+                    raise
+                # Зламана глибша сторінка не скасовує вже знайдене на попередніх
+                logging.warning("Помилка при парсингу сторінки %s сайту %s: %s", page_url, site_name, e)
+                return
+            metrics.ITEMS_MATCHED.inc(found, site=site_name)
+            yield found, articles
+
+            if not next_url or next_url in visited:
+                return
+            visited.add(next_url)
+            page_url = next_url
+
+    async def parse_site(self, session, plan):
+        site_name = plan.site_name
+        source_type = plan.site_config.get('source_type', 'auto')
+
+        # Швидкий шлях: RSS/Atom-стрічка менша за головну сторінку і дешевша в розборі
+        if source_type != 'html':
+            feed_url = plan.site_config.get('feed_url') or self.site_feeds.get(site_name)
+            if feed_url:
+                new_articles = await self.parse_feed(session, plan, feed_url)
+                if new_articles is not None:
+                    return new_articles
+                if source_type == 'feed':
+                    return []
+                logging.info("Стрічка сайту %s недоступна, використовуємо CSS-селектор", site_name)
+
+        # end_marker: рядок, після якого частина сторінки з новинами вже отримана
+        end_marker = plan.site_config.get('end_marker')
+        html = await self.fetch_page(session, site_name, plan.url,
+                                     max_bytes=plan.site_config.get('max_bytes'),
+                                     end_marker=end_marker.encode('utf-8') if end_marker else None)
+        if html is NOT_MODIFIED:
+            self.get_health(site_name).record_not_modified()
+            return []
+        if not html:
+            logging.error("Не вдалося отримати HTML для сайту %s", site_name)
+            return []
+
+        # Пошук стрічки під час першого завантаження сторінки
+        if source_type != 'html' and site_name not in self.site_feeds:
+            self.site_feeds[site_name] = discover_feed(html, plan.url)
+            if self.site_feeds[site_name]:
+                logging.info("Знайдено стрічку для сайту %s: %s", site_name, self.site_feeds[site_name])
+
+        try:
+            new_articles = []
+            first_found = 0
+            pages = self.crawl_pages(session, plan, html)
+            try:
+                page = 0
+                async for found, articles in pages:
+                    page += 1
+                    if page == 1:
+                        first_found = found
+                        if not found:
+                            logging.warning("Селектор '%s' не знайшов елементів на сайті %s",
+                                            plan.selector, site_name)
+                        elif self.switch_source(site_name, 'html'):
+                            new_articles.extend(self.collect_switched(site_name, found, articles))
+                            break
+                    # Далі не йдемо, щойно дійшли до вже відомої новини: решта стрічки старіша.
+                    # Без історії сайту (перший запуск) обмежуємося першою сторінкою
+                    stop = not found or any(self.is_seen(site_name, article) for article in articles)
+                    if not stop and page == 1 and plan.next_page_selector is not None:
+                        stop = not self.seen_news.count_since(site_name, datetime.min)
+                    new_articles.extend(self.collect_new_articles(site_name, found, articles))
+                    if stop:
+                        break
+            finally:
+                await pages.aclose()
+            # Стан сайту визначає перша сторінка; збій глибшої сторінки лише зупиняє обхід
+            self.get_health(site_name).record_success(first_found > 0)
+            if page > 1:
+                logging.info("Сайт %s: переглянуто сторінок стрічки: %d", site_name, page)
+            return new_articles
+        except Exception as e:
+            logging.error("Помилка при парсингу сайту %s: %s", site_name, e)
+            self.get_health(site_name).record_failure(e)
+            # Не запам'ятовуємо валідатори, щоб наступного разу сторінку розібрали повторно
+            self.site_validators.pop(site_name, None)
+            return []
+
+    def get_site_config(self, site_name):
+        for site_config in self.sites_config:
+            if site_config['name'] == site_name:
+                return site_config
+        return None
+
+    def recent_articles(self, site_name, days):
+        return self.seen_news.count_since(site_name, datetime.now() - timedelta(days=days))
+
+    async def check_all_sites(self):
+        return await self.check_sites([site_config['name'] for site_config in self.sites_config])
+
+    async def check_sites(self, site_names, save=True):
+        session = self.get_session()
+        tasks = []
+        for site_name in site_names:
+            plan = self.site_plans.get(site_name)
+            if plan is None:
+                continue
+            # Сайти з активною затримкою після помилок не займають з'єднання
+            if not self.get_health(site_name).allow():
+                logging.info("Пропускаємо %s: сайт тимчасово вимкнено після помилок", site_name)
+                continue
+            tasks.append(self.parse_site(session, plan))
+
+        results = await asyncio.gather(*tasks)
+        all_new_articles = []
+        for articles in results:
+            all_new_articles.extend(articles)
+
+        if save:
+            self.save_state()
+        return all_new_articles
+
+    def discard_state(self, site_name):
+        """Скасовує незбережені зміни сайту після невдалої публікації: наступна перевірка
+        завантажить сторінку повністю, а ті самі статті знову вважатимуться новими."""
+        dropped = self.seen_news.discard(site_name)
+        self.seen_index.discard(site_name, [news_id for news_id, _ in dropped])
+        if self.near_duplicates is not None:
+            for _, link in dropped:
+                self.near_duplicates.discard(canonical_url(link))
+        restore_entries(self.site_validators, self.saved_validators, (site_name, f"{site_name}#feed"))
+        restore_entries(self.site_feeds, self.saved_feeds, (site_name, f"{site_name}#source"))
+
+    def save_state(self, site_name=None):
+        """Записує переглянуті новини, валідатори та стрічки сайту site_name (або всіх сайтів)."""
+        self.save_seen_news(site_name)
+        self.save_validators(site_name)
+        self.save_feeds(site_name)
+
+
+# Перевірка одного сайту, після якої він знову ставиться в чергу планувальника.
+# publish(articles) має зберегти статті надійно: переглянуті новини записуються лише після нього
+async def check_site_task(news_parser, site_scheduler, site_name, publish):
+    try:
+        logging.debug("Перевіряємо новини %s...", site_name)
+        new_articles = await news_parser.check_sites([site_name], save=False)
+        try:
+            publish(new_articles)
+        except Exception:
+            news_parser.discard_state(site_name)
+            raise
+        news_parser.save_state(site_name)
+    except Exception as e:
+        logging.error("Помилка в завданні перевірки новин %s: %s", site_name, e)
+    finally:
+        # Видалений під час перевірки сайт більше не плануємо
+        site_config = news_parser.get_site_config(site_name)
+        if site_config is not None:
+            recent = news_parser.recent_articles(site_name, site_scheduler.history_days)
+            interval = site_scheduler.interval_for(site_config, recent)
+            # Після помилок сайт не перевіряємо раніше, ніж закінчиться затримка
+            interval = max(interval, news_parser.get_health(site_name).retry_in())
+            logging.debug("Наступна перевірка %s через %.0f с", site_name, interval)
+            site_scheduler.schedule(site_name, interval)
+
+
+# Асинхронне завдання перевірки новин: кожен сайт перевіряється окремо, коли настає його час
+async def check_news_task(news_parser, site_scheduler, publish, site_names=None):
+    if site_names is None:
+        site_names = [site_config['name'] for site_config in news_parser.sites_config]
+    site_scheduler.add_sites(site_names)
+    running = set()
+    while True:
+        site_name = await site_scheduler.next_site()
+        task = asyncio.create_task(check_site_task(news_parser, site_scheduler, site_name, publish))
+        # Зберігаємо посилання, щоб завдання не зібрав збирач сміття
+        running.add(task)
+        task.add_done_callback(running.discard)
@@ -0,0 +1,252 @@
+import hashlib
+import math
+import re
+import time
+from array import array
+from bisect import bisect_left
+from collections import deque
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Параметри відстеження, які не змінюють вміст сторінки
+TRACKING_PARAMS = {'fbclid', 'gclid', 'yclid', 'mc_cid', 'mc_eid', 'ref', 'ref_src', 'igshid', '_ga'}
+WORD_RE = re.compile(r'\w+')
+
+
+def news_hash(news_id):
+    # 64-бітний відбиток ідентифікатора новини
+    return int.from_bytes(hashlib.blake2b(news_id.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def canonical_url(link):
+    """Нормалізує посилання: без utm_* та інших міток, з відсортованими параметрами,
+    без фрагмента, кінцевої скісної риски та порту за замовчуванням."""
+    try:
+        parts = urlsplit(link.strip())
+    except ValueError:
+        return link
+    if not parts.scheme or not parts.netloc:
+        return link
+
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port and not (scheme == 'http' and port == 80 or scheme == 'https' and port == 443):
+        host = f"{host}:{port}"
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_') and key.lower() not in TRACKING_PARAMS
+    )
+    path = parts.path.rstrip('/') or '/'
+    # http і https вважаємо однією адресою
+    return urlunsplit(('https' if scheme == 'http' else scheme, host, path, urlencode(query), ''))
+
+
+def title_key(title):
+    """Заголовок без регістру, розділових знаків і зайвих пробілів."""
+    return ' '.join(WORD_RE.findall(title.lower()))
+
+
+def simhash(title):
+    """64-бітний SimHash заголовка за словами та парами сусідніх слів."""
+    words = WORD_RE.findall(title.lower())
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    if not features:
+        return 0, 0
+    # Біт відбитка встановлюється, якщо його мають більше половини ознак;
+    # стовпці двійкових рядків рахуються на рівні C замість циклу по бітах
+    columns = zip(*(format(news_hash(feature), '064b') for feature in features))
+    half = len(features) / 2
+    bits = ''.join('1' if column.count('1') > half else '0' for column in columns)
+    return int(bits, 2), len(words)
+
+
+# Індекс схожих заголовків за останні window секунд (SimHash + LSH).
+# Відбиток ділиться на max_distance + 1 смуг: якщо відбитки відрізняються не більше ніж
+# у max_distance бітах, хоча б одна смуга збігається повністю, тож порівнюємо лише
+# з кандидатами з тих самих кошиків, а не з усією історією.
+# Заголовки порівнюються лише між різними сайтами: у межах сайту шаблонні заголовки
+# ("Курс валют на 16 жовтня") легко збігаються, а повтори там відсікає канонічний URL.
+class NearDuplicateIndex:
+    # Короткі заголовки ("Погода", "Новини дня") дають випадкові збіги, тому їх не порівнюємо
+    MIN_WORDS = 4
+
+    def __init__(self, max_distance=1, window=24 * 3600):
+        self.max_distance = max_distance
+        self.window = window
+        self.bands = max_distance + 1
+        self.band_bits = 64 // self.bands
+        self.band_mask = (1 << self.band_bits) - 1
+        self.buckets = {}
+        self.urls = {}
+        # Записи в порядку додавання для видалення застарілих: (час, відбиток, сайт, канонічний URL)
+        self.entries = deque()
+
+    def band_keys(self, h):
+        return [(band, h >> (band * self.band_bits) & self.band_mask) for band in range(self.bands)]
+
+    def expire(self, now):
+        threshold = now - self.window
+        while self.entries and self.entries[0][0] < threshold:
+            added, h, site, url = self.entries.popleft()
+            if self.urls.get(url) == added:
+                del self.urls[url]
+            if h is None:
+                continue
+            for key in self.band_keys(h):
+                bucket = self.buckets.get(key)
+                if bucket is not None:
+                    bucket.discard((h, site))
+                    if not bucket:
+                        del self.buckets[key]
+
+    def find(self, url, h, site):
+        """Причина, з якої стаття вважається повтором ('url' або 'title'), або None."""
+        if url in self.urls:
+            return 'url'
+        if h is None:
+            return None
+        for key in self.band_keys(h):
+            for candidate, candidate_site in self.buckets.get(key, ()):
+                if candidate_site != site and bin(candidate ^ h).count('1') <= self.max_distance:
+                    return 'title'
+        return None
+
+    def discard(self, url):
+        # Відбиток заголовка залишається, але заголовки одного сайту між собою не порівнюються
+        self.urls.pop(url, None)
+
+    def check_and_add(self, url, title, site=None, now=None):
+        """Перевіряє статтю сайту site й запам'ятовує її. Повертає причину повтору або None."""
+        now = time.time() if now is None else now
+        self.expire(now)
+        h, words = simhash(title)
+        if words < self.MIN_WORDS:
+            h = None
+        reason = self.find(url, h, site)
+        self.urls[url] = now
+        if h is not None:
+            for key in self.band_keys(h):
+                self.buckets.setdefault(key, set()).add((h, site))
+        self.entries.append((now, h, site, url))
+        return reason
+
+
+# Фільтр Блума: відповідає "точно не бачили" без звернення до диска
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.01):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, h):
+        # Подвійне хешування з одного 64-бітного відбитка
+        h1 = h & 0xffffffff
+        h2 = (h >> 32) | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, h):
+        for pos in self.positions(h):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, h):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self.positions(h))
+
+
+# Обмежений набір відбитків для одного сайту: кільцевий буфер у порядку додавання
+# плюс відсортована копія для бінарного пошуку
+class SiteHashSet:
+    # Скільки нових відбитків тримати в звичайній множині до перебудови відсортованого масиву
+    MERGE_THRESHOLD = 1024
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.ring = array('Q')
+        self.next = 0
+        self.sorted = array('Q')
+        self.recent = set()
+
+    def __contains__(self, h):
+        if h in self.recent:
+            return True
+        i = bisect_left(self.sorted, h)
+        return i < len(self.sorted) and self.sorted[i] == h
+
+    def add(self, h):
+        # Найстаріший відбиток витісняється, коли буфер заповнений
+        if len(self.ring) < self.capacity:
+            self.ring.append(h)
+        else:
+            self.ring[self.next] = h
+            self.next = (self.next + 1) % self.capacity
+        self.recent.add(h)
+        if len(self.recent) >= self.MERGE_THRESHOLD:
+            self.merge()
+
+    def merge(self):
+        self.sorted = array('Q', sorted(self.ring))
+        self.recent.clear()
+
+    def discard(self, hashes):
+        # Рідкісна операція (невдала публікація), тож просто перебудовуємо буфер від найстарішого
+        hashes = set(hashes)
+        self.ring = array('Q', (h for h in self.ring[self.next:] + self.ring[:self.next] if h not in hashes))
+        self.next = 0
+        self.merge()
+
+    def __len__(self):
+        return len(self.ring)
+
+
+# Індекс для перевірки "чи бачили новину" з обмеженим використанням пам'яті.
+# Повні дані залишаються в сховищі і читаються з диска лише для неоднозначних випадків.
+class SeenNewsIndex:
+    def __init__(self, store, capacity_per_site=10000, bloom_capacity=0, bloom_error_rate=0.01):
+        self.store = store
+        self.capacity_per_site = capacity_per_site
+        self.sites = {}
+        self.bloom = None
+        if bloom_capacity:
+            self.bloom = BloomFilter(bloom_capacity, bloom_error_rate)
+            for news_id in store.iter_ids():
+                self.bloom.add(news_hash(news_id))
+
+    def site_set(self, site):
+        hashes = self.sites.get(site)
+        if hashes is None:
+            hashes = self.sites[site] = SiteHashSet(self.capacity_per_site)
+        return hashes
+
+    def contains(self, site, news_id):
+        h = news_hash(news_id)
+        hashes = self.site_set(site)
+        if h in hashes:
+            return True
+        if self.bloom is not None and h not in self.bloom:
+            return False
+        if news_id in self.store:
+            # Повертаємо в індекс новину, яка досі є на сторінці сайту
+            hashes.add(h)
+            return True
+        return False
+
+    def add(self, news_id, site, title, link, first_seen=None):
+        self.store.add(news_id, site, title, link, first_seen)
+        h = news_hash(news_id)
+        self.site_set(site).add(h)
+        if self.bloom is not None:
+            self.bloom.add(h)
+
+    def discard(self, site, news_ids):
+        """Забуває новини, додані, але не збережені в сховищі."""
+        hashes = self.sites.get(site)
+        if hashes is not None and news_ids:
+            hashes.discard(news_hash(news_id) for news_id in news_ids)
+
+    def remove_site(self, site):
+        self.sites.pop(site, None)
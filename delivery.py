@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import time
+from aiogram.types import ParseMode
+from aiogram.utils.exceptions import RetryAfter, Unauthorized, ChatNotFound, BadRequest
+import metrics
+
+# Чати, яким більше немає сенсу надсилати повідомлення (бот заблокований, користувач видалений тощо)
+UNREACHABLE_ERRORS = (Unauthorized, ChatNotFound)
+
+# Результат надсилання одного повідомлення
+SENT = 'sent'
+# Чат недоступний, підписника позначено заблокованим
+UNREACHABLE = 'unreachable'
+# Telegram відхилив саме повідомлення (BadRequest): повтор не допоможе
+REJECTED = 'rejected'
+# Тимчасова помилка (мережа, 5xx, тайм-аут, вичерпані повтори): повідомлення треба надіслати пізніше
+FAILED = 'failed'
+
+
+# Відро токенів для обмеження кількості запитів за секунду
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+# Паралельна розсилка з урахуванням глобального ліміту та ліміту на окремий чат
+class DeliveryEngine:
+    def __init__(self, bot, subscribers_manager, concurrency=30, global_rate=30,
+                 per_chat_interval=1.0, max_retries=3):
+        self.bot = bot
+        self.subscribers_manager = subscribers_manager
+        self.concurrency = concurrency
+        self.bucket = TokenBucket(global_rate)
+        self.per_chat_interval = per_chat_interval
+        self.max_retries = max_retries
+
+    async def send(self, chat_id, text, stats):
+        """Надсилає одне повідомлення. Повертає SENT, UNREACHABLE, REJECTED або FAILED."""
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            try:
+                with metrics.Timer(metrics.DELIVERY_SEND_SECONDS):
+                    await self.bot.send_message(
+                        chat_id,
+                        text,
+                        parse_mode=ParseMode.HTML,
+                        disable_web_page_preview=False
+                    )
+                stats['sent'] += 1
+                metrics.DELIVERY_MESSAGES.inc()
+                return SENT
+            except RetryAfter as e:
+                metrics.DELIVERY_ERRORS.inc(type=type(e).__name__)
+                # Призупиняємо лише цей чат, інші воркери продовжують розсилку
+                stats['retry_after'] += 1
+                logging.warning("Перевищено ліміт для чату %s, пауза %s с", chat_id, e.timeout)
+                await asyncio.sleep(e.timeout)
+            except UNREACHABLE_ERRORS as e:
+                metrics.DELIVERY_ERRORS.inc(type=type(e).__name__)
+                stats['unreachable'] += 1
+                logging.info("Чат %s недоступний (%s), позначаємо підписника як заблокованого", chat_id, e)
+                self.subscribers_manager.mark_blocked(chat_id)
+                return UNREACHABLE
+            except BadRequest as e:
+                metrics.DELIVERY_ERRORS.inc(type=type(e).__name__)
+                stats['rejected'] += 1
+                logging.error("Telegram відхилив повідомлення для користувача %s: %s", chat_id, e)
+                return REJECTED
+            except Exception as e:
+                metrics.DELIVERY_ERRORS.inc(type=type(e).__name__)
+                stats['failed'] += 1
+                logging.warning("Помилка при надсиланні повідомлення користувачу %s: %s", chat_id, e)
+                return FAILED
+
+        stats['failed'] += 1
+        logging.warning("Не вдалося надіслати повідомлення користувачу %s після %d спроб", chat_id, self.max_retries)
+        return FAILED
+
+    async def deliver_chat(self, chat_id, texts, stats, on_done=None):
+        for i, text in enumerate(texts):
+            if i:
+                await asyncio.sleep(self.per_chat_interval)
+            status = await self.send(chat_id, text, stats)
+            if on_done is not None:
+                on_done(chat_id, i, status)
+            if status == UNREACHABLE:
+                # Недоступному чату решту повідомлень не надсилаємо, вони теж вважаються обробленими
+                if on_done is not None:
+                    for rest in range(i + 1, len(texts)):
+                        on_done(chat_id, rest, UNREACHABLE)
+                return
+            if status == FAILED:
+                # Решту повідомлень чату відкладаємо разом із цим, щоб не порушити їхній порядок
+                return
+        self.subscribers_manager.record_delivery(chat_id)
+
+    async def worker(self, queue, stats, on_done):
+        while True:
+            try:
+                chat_id, texts = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            metrics.DELIVERY_QUEUE.inc(-1)
+            await self.deliver_chat(chat_id, texts, stats, on_done)
+
+    async def deliver(self, jobs, on_done=None):
+        """Розсилає повідомлення. jobs: словник {chat_id: [текст, ...]}.
+
+        on_done(chat_id, індекс, статус) викликається для кожного повідомлення, яке намагалися надіслати
+        або яке пропущено через недоступний чат. Після FAILED решта повідомлень чату не надсилається.
+        """
+        stats = {'sent': 0, 'failed': 0, 'rejected': 0, 'retry_after': 0, 'unreachable': 0}
+        if not jobs:
+            return stats
+
+        queue = asyncio.Queue()
+        for chat_id, texts in jobs.items():
+            queue.put_nowait((chat_id, texts))
+        # Кілька розсилок можуть іти одночасно, тому глибину черги рахуємо приростами
+        metrics.DELIVERY_QUEUE.inc(len(jobs))
+
+        started = time.monotonic()
+        workers = min(self.concurrency, len(jobs))
+        await asyncio.gather(*(self.worker(queue, stats, on_done) for _ in range(workers)))
+
+        elapsed = time.monotonic() - started
+        stats['elapsed'] = elapsed
+        stats['rate'] = stats['sent'] / elapsed if elapsed > 0 else 0.0
+        logging.info(
+            "Розсилку завершено: надіслано %d, помилок %d, заблоковано %d чатів, %.1f повідомлень/с",
+            stats['sent'], stats['failed'], stats['unreachable'], stats['rate']
+        )
+        return stats
@@ -0,0 +1,304 @@
+import json
+import logging
+import threading
+from urllib.parse import urljoin
+
+# Бекенди для розбору HTML. Швидкі бекенди необов'язкові: якщо бібліотека не встановлена,
+# використовується стандартний html.parser з BeautifulSoup
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+except ImportError:
+    SelectolaxParser = None
+
+try:
+    import lxml.html
+    from lxml import etree
+    from cssselect import HTMLTranslator
+except ImportError:
+    lxml = None
+
+
+ASCII_SPACES = ' \n\t\x0c\r'
+INVISIBLE_TAGS = ('script', 'style')
+
+
+def join_text(strings):
+    # Як BeautifulSoup: рядок лише з пробілів між тегами стискається до '\n' або ' '
+    return ''.join(string if string.strip(ASCII_SPACES) else ('\n' if '\n' in string else ' ')
+                   for string in strings).strip()
+
+
+class Bs4Backend:
+    name = 'html.parser'
+
+    def __init__(self):
+        # Імпортуємо тут, щоб швидкі бекенди працювали навіть без BeautifulSoup
+        from bs4 import BeautifulSoup
+        import soupsieve
+        self._soup = BeautifulSoup
+        self._soupsieve = soupsieve
+
+    def compile(self, selector):
+        return self._soupsieve.compile(selector)
+
+    def parse(self, html):
+        return self._soup(html, 'html.parser')
+
+    def select(self, root, compiled):
+        return compiled.select(root)
+
+    def select_one(self, node, compiled):
+        return compiled.select_one(node)
+
+    def find_link(self, node):
+        return node.find('a')
+
+    def tag(self, node):
+        return node.name
+
+    def parent(self, node):
+        return node.parent
+
+    def text(self, node):
+        return node.text.strip()
+
+    def attr(self, node, name):
+        value = node.get(name, '')
+        # BeautifulSoup повертає багатозначні атрибути (class, rel) списком
+        if isinstance(value, list):
+            value = ' '.join(value)
+        return value
+
+
+class LxmlBackend:
+    name = 'lxml'
+
+    def __init__(self):
+        # Текст без вмісту <script> і <style>, як node.text у BeautifulSoup
+        self._visible_text = etree.XPath('descendant-or-self::text()[not(parent::script or parent::style)]')
+
+    def compile(self, selector):
+        # Як і в BeautifulSoup, шукаємо лише серед нащадків елемента, а не сам елемент
+        return etree.XPath(HTMLTranslator().css_to_xpath(selector, prefix='descendant::'))
+
+    def parse(self, html):
+        return lxml.html.document_fromstring(html)
+
+    def select(self, root, compiled):
+        return compiled(root)
+
+    def select_one(self, node, compiled):
+        found = compiled(node)
+        return found[0] if found else None
+
+    def find_link(self, node):
+        return node.find('.//a')
+
+    def tag(self, node):
+        return node.tag
+
+    def parent(self, node):
+        return node.getparent()
+
+    def text(self, node):
+        return join_text(self._visible_text(node))
+
+    def attr(self, node, name):
+        return node.get(name, '')
+
+
+class SelectolaxBackend:
+    name = 'selectolax'
+
+    def compile(self, selector):
+        # selectolax не має окремої компіляції селекторів
+        return selector
+
+    def parse(self, html):
+        return SelectolaxParser(html)
+
+    def select(self, root, compiled):
+        return root.css(compiled)
+
+    def select_one(self, node, compiled):
+        # css_first може повернути сам елемент; як і інші бекенди, шукаємо лише серед нащадків
+        for found in node.css(compiled):
+            if found != node:
+                return found
+        return None
+
+    def find_link(self, node):
+        return self.select_one(node, 'a')
+
+    def tag(self, node):
+        return node.tag
+
+    def parent(self, node):
+        return node.parent
+
+    def text(self, node):
+        # Вміст <script> і <style> не є частиною заголовка
+        return join_text(child.text(deep=False) for child in node.traverse(include_text=True)
+                         if child.tag == '-text' and child.parent.tag not in INVISIBLE_TAGS)
+
+    def attr(self, node, name):
+        return node.attributes.get(name) or ''
+
+
+def available_backends():
+    backends = []
+    if SelectolaxParser is not None:
+        backends.append(SelectolaxBackend.name)
+    if lxml is not None:
+        backends.append(LxmlBackend.name)
+    backends.append(Bs4Backend.name)
+    return backends
+
+
+def get_backend(name='auto'):
+    # 'auto' обирає найшвидший доступний бекенд
+    if name in (None, '', 'auto'):
+        name = available_backends()[0]
+
+    if name == SelectolaxBackend.name and SelectolaxParser is not None:
+        return SelectolaxBackend()
+    if name == LxmlBackend.name and lxml is not None:
+        return LxmlBackend()
+    if name != Bs4Backend.name:
+        logging.warning("Бекенд '%s' недоступний, використовуємо html.parser", name)
+    return Bs4Backend()
+
+
+def resolve_link(link, base_url):
+    # Додавання базового URL, якщо посилання відносне
+    if base_url and link and not (link.startswith('http://') or link.startswith('https://')):
+        if link.startswith('/'):
+            return f"{base_url.rstrip('/')}{link}"
+        return f"{base_url.rstrip('/')}/{link.lstrip('/')}"
+    return link
+
+
+# Скомпільований план вилучення новин для одного сайту
+class ExtractionPlan:
+    def __init__(self, site_config, backend):
+        self.backend = backend
+        self.site_config = site_config
+        self.site_name = site_config['name']
+        self.url = site_config['url']
+        self.selector = site_config['selector']
+        self.title_attr = site_config.get('title_attr', '')
+        self.base_url = site_config.get('base_url', None)
+        self.compiled_selector = backend.compile(self.selector)
+        # Посилання на наступну сторінку стрічки (необов'язково)
+        self.next_page_selector = None
+        if site_config.get('next_page_selector'):
+            self.next_page_selector = backend.compile(site_config['next_page_selector'])
+
+        # Розбираємо link_attr один раз замість перевірок рядка для кожного елемента
+        link_attr = site_config.get('link_attr', 'href')
+        self.link_selector = None
+        if link_attr == 'parent':
+            self.link_mode = 'parent'
+        elif link_attr.startswith('select:'):
+            self.link_mode = 'select'
+            self.link_selector = backend.compile(link_attr.split(':', 1)[1])
+        elif not link_attr or link_attr == 'href':
+            self.link_mode = 'href'
+        else:
+            self.link_mode = 'attr'
+        self.link_attr = link_attr
+
+    def extract_link(self, item):
+        backend = self.backend
+        if self.link_mode == 'href':
+            # Шукаємо посилання всередині елемента, якщо сам елемент не є посиланням
+            if backend.tag(item) == 'a':
+                return backend.attr(item, 'href')
+            link_element = backend.find_link(item)
+            return backend.attr(link_element, 'href') if link_element is not None else ''
+        if self.link_mode == 'parent':
+            parent = backend.parent(item)
+            return backend.attr(parent, 'href') if parent is not None and backend.tag(parent) == 'a' else ''
+        if self.link_mode == 'select':
+            link_element = backend.select_one(item, self.link_selector)
+            return backend.attr(link_element, 'href') if link_element is not None else ''
+        return backend.attr(item, self.link_attr)
+
+    def extract(self, html):
+        """Повертає кількість знайдених елементів і список статей {site, title, link}."""
+        return self.extract_items(self.backend.parse(html))
+
+    def extract_page(self, html, page_url):
+        """Те саме, що extract, плюс абсолютне посилання на наступну сторінку або None."""
+        root = self.backend.parse(html)
+        found, articles = self.extract_items(root)
+        next_url = None
+        if self.next_page_selector is not None:
+            next_link = self.backend.select_one(root, self.next_page_selector)
+            href = self.backend.attr(next_link, 'href') if next_link is not None else ''
+            if href:
+                next_url = urljoin(page_url, href)
+        return found, articles, next_url
+
+    def extract_items(self, root):
+        backend = self.backend
+        news_items = backend.select(root, self.compiled_selector)
+
+        articles = []
+        for item in news_items:
+            try:
+                if self.title_attr:
+                    title = backend.attr(item, self.title_attr)
+                else:
+                    title = backend.text(item)
+                link = self.extract_link(item)
+
+                logging.debug("Заголовок з %s: %s", self.site_name, title)
+                logging.debug("Посилання з %s: %s", self.site_name, link)
+
+                # Перевірка, чи є заголовок і посилання
+                if not title:
+                    logging.debug("Не знайдено заголовок для елемента на %s", self.site_name)
+                    continue
+
+                if not link:
+                    logging.debug("Не знайдено посилання для елемента '%s' на %s", title, self.site_name)
+                    continue
+
+                articles.append({
+                    'site': self.site_name,
+                    'title': title,
+                    'link': resolve_link(link, self.base_url)
+                })
+            except Exception as e:
+                logging.error("Помилка при обробці новини з %s: %s", self.site_name, e)
+
+        return len(news_items), articles
+
+
+def compile_site(site_config, backend=None):
+    if backend is None:
+        backend = get_backend()
+    return ExtractionPlan(site_config, backend)
+
+
+# Кеш скомпільованих планів у робочому потоці чи процесі пулу
+_worker_state = threading.local()
+
+
+def worker_plan(site_config, backend_name):
+    plans = getattr(_worker_state, 'plans', None)
+    if plans is None:
+        plans = _worker_state.plans = {}
+
+    key = (backend_name, json.dumps(site_config, sort_keys=True))
+    plan = plans.get(key)
+    if plan is None:
+        plan = plans[key] = compile_site(site_config, get_backend(backend_name))
+    return plan
+
+
+def extract_page_articles(site_config, backend_name, html, page_url):
+    """Вилучення статей і посилання на наступну сторінку в пулі: план компілюється один раз
+    на кожен робочий потік чи процес."""
+    return worker_plan(site_config, backend_name).extract_page(html, page_url)
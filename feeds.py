@@ -0,0 +1,89 @@
+import html
+import logging
+import re
+import xml.etree.ElementTree as ET
+from urllib.parse import urljoin
+
+from extraction import resolve_link
+
+FEED_TYPES = ('application/rss+xml', 'application/atom+xml')
+LINK_TAG_RE = re.compile(r'<link\b[^>]*>', re.IGNORECASE)
+ATTR_RE = re.compile(r'''([a-zA-Z_:][-a-zA-Z0-9_:.]*)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))''')
+# Розмір порції, якою стрічка подається у потоковий XML-парсер
+CHUNK_SIZE = 64 * 1024
+
+
+def discover_feed(page_html, page_url):
+    """Шукає <link rel="alternate" type="application/rss+xml|atom+xml"> і повертає абсолютний URL стрічки."""
+    for tag in LINK_TAG_RE.finditer(page_html):
+        attrs = {}
+        for match in ATTR_RE.finditer(tag.group(0)):
+            value = next(group for group in match.groups()[1:] if group is not None)
+            attrs[match.group(1).lower()] = html.unescape(value)
+
+        rel = attrs.get('rel', '').lower().split()
+        feed_type = attrs.get('type', '').lower().split(';')[0].strip()
+        if 'alternate' in rel and feed_type in FEED_TYPES and attrs.get('href'):
+            return urljoin(page_url, attrs['href'])
+    return None
+
+
+def local_name(tag):
+    # Прибираємо простір імен: {http://www.w3.org/2005/Atom}entry -> entry
+    return tag.rsplit('}', 1)[-1]
+
+
+def item_fields(element):
+    title = ''
+    link = ''
+    for child in element:
+        name = local_name(child.tag)
+        if name == 'title':
+            title = ''.join(child.itertext()).strip()
+        elif name == 'link' and not link:
+            # RSS: <link>url</link>; Atom: <link rel="alternate" href="url"/>
+            if child.get('href'):
+                if child.get('rel', 'alternate') == 'alternate':
+                    link = child.get('href').strip()
+            elif child.text:
+                link = child.text.strip()
+        elif name == 'guid' and not link and child.get('isPermaLink', 'true') == 'true' and child.text:
+            link = child.text.strip()
+    return title, link
+
+
+def iter_feed_items(data):
+    """Потоково розбирає RSS або Atom і повертає пари (заголовок, посилання).
+
+    Кожен розібраний елемент одразу звільняється, тож пам'ять не залежить від розміру стрічки.
+    """
+    parser = ET.XMLPullParser(events=('end',))
+    for start in range(0, len(data), CHUNK_SIZE):
+        parser.feed(data[start:start + CHUNK_SIZE])
+        for _, element in parser.read_events():
+            if local_name(element.tag) in ('item', 'entry'):
+                yield item_fields(element)
+                element.clear()
+    parser.close()
+    for _, element in parser.read_events():
+        if local_name(element.tag) in ('item', 'entry'):
+            yield item_fields(element)
+
+
+def extract_feed_articles(site_config, data):
+    """Вилучення статей зі стрічки; повертає те саме, що й ExtractionPlan.extract."""
+    site_name = site_config['name']
+    base_url = site_config.get('base_url', None)
+    found = 0
+    articles = []
+    for title, link in iter_feed_items(data):
+        found += 1
+        logging.debug("Запис стрічки %s: %s %s", site_name, title, link)
+        if not title or not link:
+            continue
+        articles.append({
+            'site': site_name,
+            'title': title,
+            'link': resolve_link(link, base_url)
+        })
+    return found, articles
@@ -0,0 +1,90 @@
+import codecs
+import logging
+import re
+
+# Brotli необов'язковий: aiohttp розпаковує br лише якщо встановлено brotli або brotlicffi
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = 'gzip, deflate, br'
+    except ImportError:
+        ACCEPT_ENCODING = 'gzip, deflate'
+
+# Розмір порції при потоковому читанні відповіді
+CHUNK_SIZE = 64 * 1024
+# Скільки байтів з початку документа переглядати в пошуках оголошеного кодування
+SNIFF_BYTES = 4096
+
+META_CHARSET_RE = re.compile(
+    rb'''<meta[^>]+charset\s*=\s*["']?\s*([a-zA-Z0-9_.:-]+)|<\?xml[^>]+encoding\s*=\s*["']([a-zA-Z0-9_.:-]+)''',
+    re.IGNORECASE
+)
+BOMS = (
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+
+async def read_body(response, max_bytes=None, end_marker=None):
+    """Читає тіло відповіді порціями.
+
+    Зупиняється, коли прочитано max_bytes, або одразу після end_marker (байтовий рядок),
+    якщо потрібна частина сторінки вже отримана.
+    """
+    chunks = []
+    total = 0
+    tail = b''
+    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+        if max_bytes and total + len(chunk) > max_bytes:
+            chunks.append(chunk[:max_bytes - total])
+            logging.warning("Відповідь %s перевищила ліміт %d байтів і була обрізана", response.url, max_bytes)
+            break
+        chunks.append(chunk)
+        total += len(chunk)
+
+        if end_marker:
+            # Маркер може потрапити на межу порцій, тому шукаємо разом із кінцем попередньої
+            window = tail + chunk
+            if end_marker in window:
+                break
+            tail = window[-len(end_marker):]
+    return b''.join(chunks)
+
+
+def declared_charset(body):
+    for bom, charset in BOMS:
+        if body.startswith(bom):
+            return charset
+    match = META_CHARSET_RE.search(body[:SNIFF_BYTES])
+    if match:
+        return (match.group(1) or match.group(2)).decode('ascii')
+    return None
+
+
+def decode_body(body, header_charset=None):
+    """Декодує тіло за кодуванням із заголовка, BOM або meta-тегу; автовизначення - лише в крайньому разі."""
+    for charset in (header_charset, declared_charset(body)):
+        if not charset:
+            continue
+        try:
+            return body.decode(charset, errors='replace')
+        except LookupError:
+            logging.debug("Невідоме кодування %s", charset)
+
+    try:
+        return body.decode('utf-8')
+    except UnicodeDecodeError:
+        pass
+
+    try:
+        from charset_normalizer import from_bytes
+        best = from_bytes(body[:SNIFF_BYTES * 16]).best()
+        if best is not None:
+            return body.decode(best.encoding, errors='replace')
+    except ImportError:
+        pass
+    return body.decode('utf-8', errors='replace')
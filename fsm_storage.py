@@ -0,0 +1,92 @@
+import json
+import os
+import sqlite3
+from aiogram.contrib.fsm_storage.memory import MemoryStorage
+
+from subscriber_store import write_json_atomic
+
+
+# Сховище станів FSM, що переживає перезапуск: дані тримаються в пам'яті, як у MemoryStorage,
+# а кожна зміна стану користувача одразу записується на диск
+class PersistentStorage(MemoryStorage):
+    def record(self, chat, user):
+        chat, user = map(str, self.check_address(chat=chat, user=user))
+        return chat, user, self.data.get(chat, {}).get(user)
+
+    def persist(self, chat, user):
+        raise NotImplementedError
+
+    # reset_state, reset_data і finish викликають set_state та set_data, тож окремо їх не перевизначаємо
+    async def set_state(self, *, chat=None, user=None, state=None):
+        await super().set_state(chat=chat, user=user, state=state)
+        self.persist(chat, user)
+
+    async def set_data(self, *, chat=None, user=None, data=None):
+        await super().set_data(chat=chat, user=user, data=data)
+        self.persist(chat, user)
+
+    async def update_data(self, *, chat=None, user=None, data=None, **kwargs):
+        await super().update_data(chat=chat, user=user, data=data, **kwargs)
+        self.persist(chat, user)
+
+    async def set_bucket(self, *, chat=None, user=None, bucket=None):
+        await super().set_bucket(chat=chat, user=user, bucket=bucket)
+        self.persist(chat, user)
+
+    async def update_bucket(self, *, chat=None, user=None, bucket=None, **kwargs):
+        await super().update_bucket(chat=chat, user=user, bucket=bucket, **kwargs)
+        self.persist(chat, user)
+
+    async def close(self):
+        # На відміну від MemoryStorage, не очищаємо дані: вони потрібні після перезапуску
+        pass
+
+
+# JSON-файл: невеликий обсяг станів (додавання сайтів адміністратором) перезаписується атомарно
+class JsonFileStorage(PersistentStorage):
+    def __init__(self, file_path='fsm_states.json'):
+        super().__init__()
+        self.file_path = file_path
+        if os.path.exists(file_path):
+            with open(file_path, 'r', encoding='utf-8') as f:
+                self.data = json.load(f)
+
+    def persist(self, chat, user):
+        write_json_atomic(self.file_path, self.data)
+
+
+# SQLite: записується лише рядок користувача, стан якого змінився
+class SqliteStorage(PersistentStorage):
+    def __init__(self, db_path='fsm_states.db'):
+        super().__init__()
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS fsm_states ('
+            'chat TEXT, user TEXT, record TEXT, PRIMARY KEY (chat, user)'
+            ') WITHOUT ROWID'
+        )
+        self.conn.commit()
+        for chat, user, record in self.conn.execute('SELECT chat, user, record FROM fsm_states'):
+            self.data.setdefault(chat, {})[user] = json.loads(record)
+
+    def persist(self, chat, user):
+        chat, user, record = self.record(chat, user)
+        with self.conn:
+            if record is None:
+                self.conn.execute('DELETE FROM fsm_states WHERE chat = ? AND user = ?', (chat, user))
+            else:
+                self.conn.execute('INSERT OR REPLACE INTO fsm_states VALUES (?, ?, ?)',
+                                  (chat, user, json.dumps(record, ensure_ascii=False)))
+
+    async def wait_closed(self):
+        self.conn.close()
+
+
+def open_fsm_storage(backend='sqlite'):
+    if backend == 'memory':
+        return MemoryStorage()
+    if backend == 'json':
+        return JsonFileStorage()
+    return SqliteStorage()
@@ -0,0 +1,74 @@
+import random
+import time
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+# Стан доступності сайту: експоненційна затримка після помилок і запобіжник (circuit breaker)
+class SiteHealth:
+    def __init__(self, failure_threshold=3, empty_threshold=5, backoff_base=60, backoff_max=6 * 3600):
+        self.failure_threshold = failure_threshold
+        self.empty_threshold = empty_threshold
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.state = CLOSED
+        self.failures = 0
+        self.empty_results = 0
+        self.retry_at = 0.0
+        self.last_error = None
+        # Чи знайшов селектор елементи під час останнього розбору сторінки
+        self.last_found = True
+
+    def allow(self):
+        """Чи можна зараз звертатися до сайту. Відкритий запобіжник пропускає одну пробну перевірку."""
+        if time.monotonic() < self.retry_at:
+            return False
+        if self.state == OPEN:
+            self.state = HALF_OPEN
+        return True
+
+    def retry_in(self):
+        return max(0.0, self.retry_at - time.monotonic())
+
+    def record_success(self, found=True):
+        self.last_found = found
+        if not found:
+            # Селектор нічого не знайшов: імовірно, змінилася верстка сайту
+            self.empty_results += 1
+            if self.empty_results >= self.empty_threshold:
+                self.record_failure('селектор не знаходить елементів')
+            return
+
+        self.state = CLOSED
+        self.failures = 0
+        self.empty_results = 0
+        self.retry_at = 0.0
+        self.last_error = None
+
+    def record_not_modified(self):
+        """Сторінка не змінилася: результат той самий, що й під час останнього розбору,
+        тож зламаний селектор на незмінній сторінці все одно відкриває запобіжник."""
+        self.record_success(self.last_found)
+
+    def record_failure(self, error):
+        self.failures += 1
+        self.last_error = str(error)
+
+        # Експоненційна затримка з випадковим відхиленням, щоб сайти не відновлювалися одночасно
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (self.failures - 1))
+        self.retry_at = time.monotonic() + random.uniform(delay / 2, delay)
+
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = OPEN
+
+    def describe(self):
+        if self.state == CLOSED and not self.failures:
+            return "🟢 працює"
+        if self.state == CLOSED:
+            return f"🟠 помилок поспіль: {self.failures} ({self.last_error})"
+        if self.state == HALF_OPEN:
+            return "🟡 пробна перевірка"
+        return (f"🔴 вимкнено ще на {self.retry_in() / 60:.0f} хв, "
+                f"помилок поспіль: {self.failures} ({self.last_error})")
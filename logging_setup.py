@@ -0,0 +1,56 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+
+
+# Форматування записів у JSON-рядки для структурованого журналу
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False)
+
+
+def setup_logging(level='INFO', log_file=None, json_format=False):
+    """Налаштовує журнал так, щоб запис у файл і консоль виконувався окремим потоком.
+
+    Цикл подій лише кладе запис у чергу через QueueHandler, а QueueListener
+    форматує та пише його у фоновому потоці.
+    """
+    if json_format:
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file, encoding='utf-8'))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(level)
+
+    listener.start()
+    # Дописуємо записи, що залишилися в черзі, під час завершення процесу
+    atexit.register(listener.stop)
+    return listener
+
+
+def setup_worker_logging(level='INFO'):
+    # Процеси пулу розбору не мають потоку QueueListener, тому пишуть напряму в консоль
+    logging.basicConfig(level=level, format='%(asctime)s %(levelname)s %(processName)s: %(message)s', force=True)
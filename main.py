@@ -1,25 +1,33 @@
 import asyncio
-import aiohttp
-from bs4 import BeautifulSoup
 import json
 import os
-from datetime import datetime
+import time
 import logging
+from matching import KeywordMatcher
+from delivery import DeliveryEngine, FAILED
+from outbox import Outbox
+from subscriber_store import open_subscriber_store, write_json_atomic
+from scheduler import SiteScheduler
+from checking import NewsParser, check_news_task
+import metrics
+from logging_setup import setup_logging
+from fsm_storage import open_fsm_storage
+from webhook import WebhookServer
 from aiogram import Bot, Dispatcher, types
 from aiogram.utils import executor
 from aiogram.utils.markdown import hbold, hlink, quote_html
-from aiogram.contrib.fsm_storage.memory import MemoryStorage
 from aiogram.dispatcher import FSMContext
 from aiogram.dispatcher.filters.state import State, StatesGroup
 from aiogram.types import ParseMode, ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
-from config import *
+from settings import *
 
 # Налаштування логування
-logging.basicConfig(level=logging.INFO)
+setup_logging(LOG_LEVEL, LOG_FILE, LOG_JSON)
 
 # Ініціалізація бота і диспетчера
 bot = Bot(token=TOKEN)
-storage = MemoryStorage()
+# Стан діалогу додавання сайту зберігається на диску і переживає перезапуск
+storage = open_fsm_storage(FSM_STORAGE)
 dp = Dispatcher(bot, storage=storage)
 
 
@@ -35,309 +43,376 @@ class SiteForm(StatesGroup):
 
 # Клас для роботи з підписниками
 class SubscribersManager:
-    def __init__(self, file_path='subscribers.json'):
-        self.file_path = file_path
-        self.subscribers = self.load_subscribers()
-
-    def load_subscribers(self):
-        if os.path.exists(self.file_path):
-            with open(self.file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return []
+    def __init__(self, backend='sqlite', file_path='subscribers.json', db_file='subscribers.db',
+                 preferences_file='subscriptions.json', save_delay=2.0):
+        self.store = open_subscriber_store(backend, file_path, db_file)
+        # Вибрані сайти та ключові слова: {user_id: {'sites': [...] або None, 'keywords': [...]}}
+        self.preferences_file = preferences_file
+        self.preferences = self.load_preferences()
+        self.preferences_dirty = False
+        self.save_delay = save_delay
+        self.save_handle = None
+        self.build_index()
+
+    def load_preferences(self):
+        if os.path.exists(self.preferences_file):
+            with open(self.preferences_file, 'r', encoding='utf-8') as f:
+                return {int(user_id): data for user_id, data in json.load(f).items()}
+        return {}
 
-    def save_subscribers(self):
-        with open(self.file_path, 'w', encoding='utf-8') as f:
-            json.dump(self.subscribers, f, ensure_ascii=False, indent=2)
+    def schedule_save(self):
+        # Зміни за save_delay секунд (наприклад, хвиля /start після поста в каналі) зливаються в один запис
+        if self.save_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        self.save_handle = loop.call_later(self.save_delay, self.flush)
+
+    def flush(self):
+        self.save_handle = None
+        self.store.commit()
+        if self.preferences_dirty:
+            write_json_atomic(self.preferences_file, self.preferences)
+            self.preferences_dirty = False
+
+    def close(self):
+        if self.save_handle is not None:
+            self.save_handle.cancel()
+        self.flush()
+        self.store.close()
+
+    def build_index(self):
+        # Інвертований індекс сайт -> підписники; користувачі без вибору отримують усі сайти
+        self.site_index = {}
+        self.site_filtered = set()
+        self.keyword_index = {}
+        self.keyword_users = set()
+        for user_id, data in self.preferences.items():
+            self.index_user(user_id, data)
+        self.matcher = None
+
+    def index_user(self, user_id, data):
+        if data.get('sites') is not None:
+            self.site_filtered.add(user_id)
+            for site_name in data['sites']:
+                self.site_index.setdefault(site_name, set()).add(user_id)
+        if data.get('keywords'):
+            self.keyword_users.add(user_id)
+            for keyword in data['keywords']:
+                self.keyword_index.setdefault(keyword, set()).add(user_id)
+
+    def unindex_user(self, user_id):
+        data = self.preferences.get(user_id)
+        if not data:
+            return
+        self.site_filtered.discard(user_id)
+        self.keyword_users.discard(user_id)
+        for site_name in data.get('sites') or []:
+            self.site_index.get(site_name, set()).discard(user_id)
+        for keyword in data.get('keywords', []):
+            users = self.keyword_index.get(keyword)
+            if users is not None:
+                users.discard(user_id)
+                if not users:
+                    del self.keyword_index[keyword]
+
+    def update_preferences(self, user_id, sites=..., keywords=...):
+        self.unindex_user(user_id)
+        data = dict(self.preferences.get(user_id, {'sites': None, 'keywords': []}))
+        if sites is not ...:
+            data['sites'] = sites
+        if keywords is not ...:
+            data['keywords'] = keywords
+        self.preferences[user_id] = data
+        self.index_user(user_id, data)
+        # Автомат ключових слів перебудовується при наступному пошуку
+        self.matcher = None
+        self.preferences_dirty = True
+        self.schedule_save()
+
+    def get_preferences(self, user_id):
+        return self.preferences.get(user_id, {'sites': None, 'keywords': []})
+
+    def toggle_site(self, user_id, site_name, all_sites):
+        sites = self.get_preferences(user_id)['sites']
+        selected = set(all_sites if sites is None else sites)
+        selected ^= {site_name}
+        # Якщо вибрано всі сайти, зберігаємо None, щоб нові сайти теж надходили
+        self.update_preferences(user_id, sites=None if selected >= set(all_sites) else sorted(selected))
+
+    def set_keywords(self, user_id, keywords):
+        self.update_preferences(user_id, keywords=sorted({keyword.lower() for keyword in keywords if keyword}))
+
+    def get_matcher(self):
+        if self.matcher is None:
+            self.matcher = KeywordMatcher(self.keyword_index)
+        return self.matcher
+
+    def recipients(self, article, subscribers):
+        """Підписники, яким потрібно надіслати статтю, з урахуванням вибраних сайтів і ключових слів."""
+        # Користувачі без вибору сайтів + ті, хто вибрав цей сайт
+        recipients = subscribers - self.site_filtered
+        recipients |= self.site_index.get(article.get('site'), set()) & subscribers
+
+        # Фільтр за ключовими словами: один прохід автомата по заголовку для всіх підписників
+        if self.keyword_users:
+            matched = set()
+            for keyword in self.get_matcher().search(article.get('title', '').lower()):
+                matched |= self.keyword_index[keyword]
+            recipients = (recipients - self.keyword_users) | (recipients & matched)
+        return recipients
 
     def add_subscriber(self, user_id):
-        if user_id not in self.subscribers:
-            self.subscribers.append(user_id)
-            self.save_subscribers()
+        if self.store.add(user_id):
+            self.schedule_save()
             return True
         return False
 
     def remove_subscriber(self, user_id):
-        if user_id in self.subscribers:
-            self.subscribers.remove(user_id)
-            self.save_subscribers()
+        if self.store.remove(user_id):
+            self.schedule_save()
             return True
         return False
 
-    def get_subscribers(self):
-        return self.subscribers
-
-
-# Клас для парсингу новин
-class NewsParser:
-    def __init__(self, sites_config_file='sites_config.json', seen_news_file='seen_news.json'):
-        self.sites_config_file = sites_config_file
-        self.seen_news_file = seen_news_file
-        self.sites_config = self.load_sites_config()
-        self.seen_news = self.load_seen_news()
-
-    def load_sites_config(self):
-        if os.path.exists(self.sites_config_file):
-            with open(self.sites_config_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        else:
-            # Стандартна конфігурація, якщо файл не існує
-            # https://ain.ua/  |  https://vctr.media/ua/   |  https://blog.hubspot.com/  |  https://cases.media/en
-            # |  https://www.komarov.design/
-
-            default_config = [
-                {
-                    'name': 'AIN.UA',
-                    'url': 'https://ain.ua/',
-                    'selector': '.post-link',
-                    'title_attr': '',
-                    'link_attr': 'href',
-                    'base_url': 'https://ain.ua'
-                },
-                {
-                    'name': 'Vector',
-                    'url': 'https://vctr.media/ua/',
-                    'selector': '.jeg_post_title a',
-                    'title_attr': '',
-                    'link_attr': 'href',
-                    'base_url': ''
-                },
-                {
-                    'name': 'HubSpot Blog',
-                    'url': 'https://blog.hubspot.com/',
-                    'selector': '.blog-card__title-link',
-                    'title_attr': '',
-                    'link_attr': 'href',
-                    'base_url': ''
-                },
-                {
-                    'name': 'Komarov Design',
-                    'url': 'https://www.komarov.design/',
-                    'selector': '.loop.inset-hover .secondary-button',
-                    'title_attr': '',
-                    'link_attr': 'href',
-                    'base_url': 'https://www.komarov.design'
-                }
-            ]
-            self.save_sites_config(default_config)
-            return default_config
-
-    def save_sites_config(self, config=None):
-        if config is None:
-            config = self.sites_config
-        with open(self.sites_config_file, 'w', encoding='utf-8') as f:
-            json.dump(config, f, ensure_ascii=False, indent=2)
-
-    def add_site(self, site_config):
-        self.sites_config.append(site_config)
-        self.save_sites_config()
-
-    def remove_site(self, site_name):
-        self.sites_config = [site for site in self.sites_config if site['name'] != site_name]
-        self.save_sites_config()
-        return len(self.sites_config)
-
-    def load_seen_news(self):
-        if os.path.exists(self.seen_news_file):
-            with open(self.seen_news_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {}
+    def mark_blocked(self, user_id):
+        # Чат недоступний: не надсилаємо йому нічого, доки користувач знову не натисне /start
+        if self.store.set_blocked(user_id):
+            self.schedule_save()
 
-    def save_seen_news(self):
-        with open(self.seen_news_file, 'w', encoding='utf-8') as f:
-            json.dump(self.seen_news, f, ensure_ascii=False, indent=2)
+    def record_delivery(self, user_id):
+        self.store.record_delivery(user_id)
+        self.schedule_save()
 
-    async def fetch_page(self, session, url):
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'uk-UA,uk;q=0.8,en-US;q=0.5,en;q=0.3',
-            }
-            async with session.get(url, headers=headers, timeout=15) as response:
-                if response.status == 200:
-                    return await response.text()
-                else:
-                    logging.warning(f"Помилка при отриманні сторінки {url}: {response.status}")
-                    return None
-        except Exception as e:
-            logging.error(f"Виникла помилка при запиті до {url}: {e}")
-            return None
+    def get_subscriber(self, user_id):
+        """Метадані підписника: дата підписки, чи заблоковано бота, час останньої розсилки."""
+        return self.store.get(user_id)
 
-    async def parse_site(self, session, site_name, url, selector, title_attr, link_attr, base_url=None):
-        html = await self.fetch_page(session, url)
-        if not html:
-            logging.error(f"Не вдалося отримати HTML для сайту {site_name}")
-            return []
+    def get_subscribers(self):
+        # Множина активних підписників; не змінювати
+        return self.store.active
 
-        try:
-            soup = BeautifulSoup(html, 'html.parser')
-            news_items = soup.select(selector)
-
-            if not news_items:
-                logging.warning(f"Селектор '{selector}' не знайшов елементів на сайті {site_name}")
-
-            logging.info(f"Знайдено {len(news_items)} елементів на сайті {site_name}")
-
-            new_articles = []
-
-            for item in news_items:
-                try:
-                    # Отримання заголовку
-                    if title_attr:
-                        title = item.get(title_attr, '')
-                    else:
-                        title = item.text.strip()
-
-                    # Логуємо знайдений заголовок
-                    logging.info(f"Заголовок з {site_name}: {title}")
-
-                    # Отримання посилання - виправлено обробку посилань
-                    link = ""
-                    if link_attr == 'href' and item.name == 'a':
-                        link = item.get('href', '')
-                    elif link_attr == 'parent':
-                        parent = item.parent
-                        link = parent.get('href', '') if parent and parent.name == 'a' else ''
-                    elif link_attr.startswith('select:'):
-                        link_selector = link_attr.split(':', 1)[1]
-                        link_element = item.select_one(link_selector)
-                        link = link_element.get('href', '') if link_element else ''
-                    elif not link_attr or link_attr == 'href':
-                        # Шукаємо посилання всередині елемента, якщо сам елемент не є посиланням
-                        if item.name != 'a':
-                            link_element = item.find('a')
-                            link = link_element.get('href', '') if link_element else ''
-                        else:
-                            link = item.get('href', '')
-                    else:
-                        link = item.get(link_attr, '')
-
-                    # Логуємо знайдене посилання
-                    logging.info(f"Посилання з {site_name}: {link}")
-
-                    # Перевірка, чи є заголовок і посилання
-                    if not title:
-                        logging.warning(f"Не знайдено заголовок для елемента на {site_name}")
-                        continue
-
-                    if not link:
-                        logging.warning(f"Не знайдено посилання для елемента '{title}' на {site_name}")
-                        continue
-
-                    # Додавання базового URL, якщо посилання відносне
-                    if base_url and link and not (link.startswith('http://') or link.startswith('https://')):
-                        if link.startswith('/'):
-                            link = f"{base_url.rstrip('/')}{link}"
-                        else:
-                            link = f"{base_url.rstrip('/')}/{link.lstrip('/')}"
-                        logging.info(f"Оновлене посилання з базовим URL: {link}")
-
-                    # Створення унікального ідентифікатора для новини
-                    news_id = f"{site_name}:{link}"
-
-                    # Перевірка, чи бачили ми цю новину раніше
-                    if news_id not in self.seen_news:
-                        self.seen_news[news_id] = {
-                            'title': title,
-                            'link': link,
-                            'first_seen': datetime.now().isoformat()
-                        }
-                        new_articles.append({
-                            'site': site_name,
-                            'title': title,
-                            'link': link
-                        })
-                        logging.info(f"Додано нову статтю: {title} з {site_name}")
-                except Exception as e:
-                    logging.error(f"Помилка при обробці новини з {site_name}: {e}")
-
-            return new_articles
-        except Exception as e:
-            logging.error(f"Помилка при парсингу сайту {site_name}: {e}")
-            return []
-
-    async def check_all_sites(self):
-        async with aiohttp.ClientSession() as session:
-            tasks = []
-            for site_config in self.sites_config:
-                tasks.append(
-                    self.parse_site(
-                        session,
-                        site_config['name'],
-                        site_config['url'],
-                        site_config['selector'],
-                        site_config.get('title_attr', ''),
-                        site_config.get('link_attr', 'href'),
-                        site_config.get('base_url', None)
-                    )
-                )
-
-            results = await asyncio.gather(*tasks)
-            all_new_articles = []
-            for articles in results:
-                all_new_articles.extend(articles)
-
-            self.save_seen_news()
-            return all_new_articles
+    def count_blocked(self):
+        return self.store.count_blocked()
 
 
 # Ініціалізація менеджерів
-subscribers_manager = SubscribersManager()
-news_parser = NewsParser()
+subscribers_manager = SubscribersManager(
+    backend=SUBSCRIBERS_BACKEND,
+    save_delay=SUBSCRIBERS_SAVE_DELAY
+)
+news_parser = NewsParser(
+    html_backend=HTML_BACKEND,
+    parse_executor=PARSE_EXECUTOR,
+    parse_workers=PARSE_WORKERS,
+    seen_backend=SEEN_NEWS_BACKEND,
+    seen_ttl_days=SEEN_NEWS_TTL_DAYS,
+    dedup_capacity_per_site=DEDUP_CAPACITY_PER_SITE,
+    dedup_bloom_capacity=DEDUP_BLOOM_CAPACITY,
+    http_options=HTTP_OPTIONS,
+    health_options=HEALTH_OPTIONS,
+    max_bytes=FETCH_MAX_BYTES,
+    near_duplicate_distance=NEAR_DUPLICATE_DISTANCE,
+    near_duplicate_window=NEAR_DUPLICATE_WINDOW,
+    feed_max_failures=FEED_MAX_FAILURES
+)
+outbox = Outbox(checkpoint_every=OUTBOX_CHECKPOINT_EVERY, max_attempts=OUTBOX_MAX_ATTEMPTS)
+delivery_engine = DeliveryEngine(
+    bot,
+    subscribers_manager,
+    concurrency=DELIVERY_CONCURRENCY,
+    global_rate=DELIVERY_GLOBAL_RATE,
+    per_chat_interval=DELIVERY_PER_CHAT_INTERVAL
+)
+site_scheduler = SiteScheduler(
+    CHECK_INTERVAL,
+    min_interval=SCHEDULER_MIN_INTERVAL,
+    max_interval=SCHEDULER_MAX_INTERVAL,
+    articles_per_check=SCHEDULER_ARTICLES_PER_CHECK,
+    history_days=SCHEDULER_HISTORY_DAYS
+)
+
+
+def format_article(article):
+    # Перевірка наявності всіх необхідних полів
+    site_name = article.get('site', 'Невідомий сайт')
+    title = article.get('title', 'Без заголовку')
+    link = article.get('link', '')
+
+    # Логування для відлагодження
+    logging.debug("Підготовка повідомлення: Сайт=%s, Заголовок=%s, Посилання=%s", site_name, title, link)
+
+    # Формуємо повідомлення з перевіркою посилання
+    if link:
+        return (
+            f"📰 {hbold(site_name)}\n\n"
+            f"{quote_html(title)}\n\n"
+            f"🔗 {hlink('Читати повністю', link)}"
+        )
+    return (
+        f"📰 {hbold(site_name)}\n\n"
+        f"{quote_html(title)}\n\n"
+        f"⚠️ Посилання недоступне"
+    )
 
 
-# Асинхронне завдання перевірки новин
-async def check_news_task():
+# Максимальна довжина повідомлення Telegram
+MESSAGE_LIMIT = 4096
+
+
+def format_digest(articles):
+    """Об'єднує статті в якомога менше повідомлень, згрупованих за сайтом."""
+    by_site = {}
+    for article in articles:
+        by_site.setdefault(article.get('site', 'Невідомий сайт'), []).append(article)
+
+    messages = []
+    current = ''
+    for site_name, site_articles in by_site.items():
+        header = f"📰 {hbold(site_name)}\n"
+        for i, article in enumerate(site_articles):
+            title = article.get('title', 'Без заголовку')
+            link = article.get('link', '')
+            line = f"• {hlink(title, link)}\n" if link else f"• {quote_html(title)}\n"
+            if len(line) > MESSAGE_LIMIT // 2:
+                # Задовгий заголовок обрізаємо, щоб рядок точно вмістився в повідомлення
+                title = title[:MESSAGE_LIMIT // 4] + '…'
+                line = f"• {hlink(title, link)}\n" if link else f"• {quote_html(title)}\n"
+
+            # Заголовок сайту повторюємо, якщо група продовжується в новому повідомленні
+            chunk = ('\n' if current else '') + header + line if i == 0 else line
+            if current and len(current) + len(chunk) > MESSAGE_LIMIT:
+                messages.append(current)
+                current = header + line
+            else:
+                current += chunk
+
+    if current:
+        messages.append(current)
+    return messages
+
+
+def route_articles(articles):
+    """Розподіляє статті між підписниками: {user_id: (індекси статей, ...)}."""
+    subscribers = subscribers_manager.get_subscribers()
+    everything = tuple(range(len(articles)))
+    # Без персональних налаштувань усі отримують усе
+    if not subscribers_manager.preferences:
+        return {user_id: everything for user_id in subscribers}
+
+    routes = {}
+    for i, article in enumerate(articles):
+        for user_id in subscribers_manager.recipients(article, subscribers):
+            routes.setdefault(user_id, []).append(i)
+    return {user_id: tuple(indexes) for user_id, indexes in routes.items()}
+
+
+def publish_articles(new_articles):
+    """Ставить нові статті в outbox; розсилає їх deliver_outbox_task."""
+    if DIGEST_MODE:
+        # Накопичуємо статті до завершення вікна дайджесту; вони зберігаються в outbox і переживають перезапуск
+        if new_articles:
+            outbox.hold(new_articles)
+        held, held_since = outbox.held_articles()
+
+        if held and time.time() - held_since >= DIGEST_WINDOW:
+            routes = route_articles(held)
+            first_seen = min((article.get('first_seen') for article in held if article.get('first_seen')),
+                             default=None)
+
+            # Однакові набори статей форматуються один раз
+            messages = []
+            digests = {}
+            for indexes in routes.values():
+                if indexes not in digests:
+                    texts = format_digest([held[i] for i in indexes])
+                    digests[indexes] = list(range(len(messages), len(messages) + len(texts)))
+                    messages.extend((text, first_seen, '') for text in texts)
+            logging.info("Дайджест: %d новин у %d варіантах для %d підписників.",
+                         len(held), len(digests), len(routes))
+            outbox.enqueue(messages, {user_id: digests[indexes] for user_id, indexes in routes.items()},
+                           release_held=True)
+
+    elif new_articles:
+        routes = route_articles(new_articles)
+        logging.info("Знайдено %d нових новин. Розсилаємо %d підписникам.", len(new_articles), len(routes))
+
+        messages = [(format_article(article), article.get('first_seen'), article.get('site', ''))
+                    for article in new_articles]
+        outbox.enqueue(messages, routes)
+
+
+# Режим RUN_MODE = 'bot': сайти перевіряють воркери checker.py, а бот лише забирає нові статті
+async def receive_articles_task():
     while True:
         try:
-            logging.info(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Перевіряємо новини...")
-            new_articles = await news_parser.check_all_sites()
-
-            if new_articles:
-                subscribers = subscribers_manager.get_subscribers()
-                logging.info(f"Знайдено {len(new_articles)} нових новин. Розсилаємо {len(subscribers)} підписникам.")
-
-                for article in new_articles:
-                    # Перевірка наявності всіх необхідних полів
-                    site_name = article.get('site', 'Невідомий сайт')
-                    title = article.get('title', 'Без заголовку')
-                    link = article.get('link', '')
-
-                    # Логування для відлагодження
-                    logging.info(f"Підготовка повідомлення: Сайт={site_name}, Заголовок={title}, Посилання={link}")
-
-                    # Формуємо повідомлення з перевіркою посилання
-                    if link:
-                        message_text = (
-                            f"📰 {hbold(site_name)}\n\n"
-                            f"{quote_html(title)}\n\n"
-                            f"🔗 {hlink('Читати повністю', link)}"
-                        )
-                    else:
-                        message_text = (
-                            f"📰 {hbold(site_name)}\n\n"
-                            f"{quote_html(title)}\n\n"
-                            f"⚠️ Посилання недоступне"
-                        )
-
-                    for user_id in subscribers:
-                        try:
-                            await bot.send_message(
-                                user_id,
-                                message_text,
-                                parse_mode=ParseMode.HTML,
-                                disable_web_page_preview=False
-                            )
-                            # Невелика затримка, щоб не перевищити ліміти Telegram API
-                            await asyncio.sleep(0.1)
-                        except Exception as e:
-                            logging.error(f"Помилка при надсиланні повідомлення користувачу {user_id}: {e}")
+            articles = outbox.take_incoming(HANDOFF_BATCH)
+            # Порожній виклик теж потрібен: у режимі дайджесту він перевіряє, чи не минуло вікно
+            publish_articles(articles)
+            if not articles:
+                await asyncio.sleep(HANDOFF_POLL_INTERVAL)
+        except Exception as e:
+            logging.error("Помилка при отриманні статей від воркерів перевірки: %s", e)
+            # Статті залишаються в incoming_articles і будуть опубліковані з наступною спробою
+            outbox.release_taken()
+            await asyncio.sleep(5)
 
+
+# Вікно дайджесту може закінчитися між перевірками сайтів, тож у режимі RUN_MODE = 'all'
+# перевіряємо його окремо (у режимі 'bot' це робить receive_articles_task)
+async def flush_digest_task():
+    while True:
+        await asyncio.sleep(min(max(DIGEST_WINDOW, 1), 60))
+        try:
+            publish_articles([])
         except Exception as e:
-            logging.error(f"Помилка в завданні перевірки новин: {e}")
+            logging.error("Помилка при відправці дайджесту: %s", e)
+
 
-        # Затримка перед наступною перевіркою
-        await asyncio.sleep(CHECK_INTERVAL)
+# Розсилка з outbox пакетами чатів; оброблені повідомлення видаляються з бази пакетно,
+# тож після перезапуску розсилка продовжується без повторного надсилання всього
+async def deliver_outbox_task():
+    # Пауза після пакета, в якому нічого не вдалося надіслати (збій мережі чи Telegram)
+    backoff = 0
+    while True:
+        try:
+            batch = outbox.next_batch(OUTBOX_BATCH_CHATS)
+            if not batch:
+                await outbox.wait()
+                continue
+
+            subscribers = subscribers_manager.get_subscribers()
+            jobs = {}
+            for chat_id, items in batch.items():
+                if chat_id in subscribers:
+                    jobs[chat_id] = [text for _, text in items]
+                else:
+                    # Підписник відписався або заблокував бота, поки повідомлення чекали в черзі
+                    for message_id, _ in items:
+                        outbox.ack(chat_id, message_id)
+
+            def on_done(chat_id, i, status):
+                message_id = batch[chat_id][i][0]
+                # Після тимчасової помилки повідомлення залишається в outbox для наступної спроби
+                if status == FAILED:
+                    outbox.fail(chat_id, message_id)
+                else:
+                    outbox.ack(chat_id, message_id)
+
+            stats = await delivery_engine.deliver(jobs, on_done=on_done)
+            outbox.checkpoint()
+            if stats['failed'] and not stats['sent']:
+                backoff = min(max(backoff * 2, 5), 300)
+                logging.warning("Розсилка не вдається, повтор через %d с", backoff)
+                await asyncio.sleep(backoff)
+            else:
+                backoff = 0
+        except Exception as e:
+            logging.error("Помилка в завданні розсилки: %s", e)
+            outbox.checkpoint()
+            await asyncio.sleep(5)
 
 
 # Обробники команд бота
@@ -347,6 +422,7 @@ async def cmd_start(message: types.Message):
     keyboard = ReplyKeyboardMarkup(resize_keyboard=True)
     keyboard.add(KeyboardButton("📰 Підписатися на новини"))
     keyboard.add(KeyboardButton("🔕 Відписатися від новин"))
+    keyboard.add(KeyboardButton("⚙️ Мої сайти"))
 
     await message.answer(
         f"Вітаю, {message.from_user.first_name}! 👋\n\n"
@@ -373,6 +449,68 @@ async def unsubscribe(message: types.Message):
         await message.answer("ℹ️ Ви не були підписані на оновлення новин.")
 
 
+def my_sites_keyboard(user_id):
+    selected = subscribers_manager.get_preferences(user_id)['sites']
+    keyboard = InlineKeyboardMarkup()
+    for site in news_parser.sites_config:
+        mark = "✅" if selected is None or site['name'] in selected else "▫️"
+        keyboard.add(InlineKeyboardButton(f"{mark} {site['name']}", callback_data=f"my_site:{site['name']}"))
+    return keyboard
+
+
+@dp.message_handler(commands=['mysites'])
+@dp.message_handler(lambda message: message.text == "⚙️ Мої сайти")
+async def cmd_my_sites(message: types.Message):
+    if not news_parser.sites_config:
+        await message.answer("🔍 Поки що немає налаштованих сайтів для моніторингу.")
+        return
+
+    keywords = subscribers_manager.get_preferences(message.from_user.id)['keywords']
+    await message.answer(
+        "Оберіть сайти, новини з яких ви хочете отримувати:\n\n"
+        f"🔎 Ключові слова: {quote_html(', '.join(keywords)) if keywords else 'не задано'}\n"
+        "Щоб отримувати лише новини з певними словами, надішліть /keywords слово1, слово2",
+        reply_markup=my_sites_keyboard(message.from_user.id),
+        parse_mode=ParseMode.HTML
+    )
+
+
+@dp.callback_query_handler(lambda c: c.data.startswith("my_site:"))
+async def toggle_my_site(callback_query: types.CallbackQuery):
+    site_name = callback_query.data.split(':', 1)[1]
+    all_sites = [site['name'] for site in news_parser.sites_config]
+    if site_name in all_sites:
+        subscribers_manager.toggle_site(callback_query.from_user.id, site_name, all_sites)
+
+    await bot.answer_callback_query(callback_query.id)
+    await bot.edit_message_reply_markup(
+        callback_query.from_user.id,
+        callback_query.message.message_id,
+        reply_markup=my_sites_keyboard(callback_query.from_user.id)
+    )
+
+
+@dp.message_handler(commands=['keywords'])
+async def cmd_keywords(message: types.Message):
+    args = message.get_args().strip()
+    if not args:
+        keywords = subscribers_manager.get_preferences(message.from_user.id)['keywords']
+        await message.answer(
+            f"🔎 Ваші ключові слова: {quote_html(', '.join(keywords)) if keywords else 'не задано'}\n\n"
+            "Надішліть /keywords слово1, слово2, щоб отримувати лише новини з цими словами в заголовку, "
+            "або /keywords -, щоб отримувати всі новини.",
+            parse_mode=ParseMode.HTML
+        )
+        return
+
+    keywords = [] if args == '-' else [keyword.strip() for keyword in args.split(',')]
+    subscribers_manager.set_keywords(message.from_user.id, keywords)
+    if keywords:
+        await message.answer("✅ Ключові слова збережено.")
+    else:
+        await message.answer("✅ Фільтр за ключовими словами вимкнено.")
+
+
 @dp.message_handler(commands=['sites'])
 async def cmd_sites(message: types.Message):
     sites = news_parser.sites_config
@@ -380,12 +518,20 @@ async def cmd_sites(message: types.Message):
         await message.answer("🔍 Поки що немає налаштованих сайтів для моніторингу.")
         return
 
+    is_admin = message.from_user.id == ADMIN_ID
+
     text = "📋 Список сайтів для моніторингу:\n\n"
     for i, site in enumerate(sites, 1):
-        text += f"{i}. {hbold(site['name'])}\n   🌐 {site['url']}\n\n"
+        text += f"{i}. {hbold(site['name'])}\n   🌐 {site['url']}\n"
+        # Адміністратор бачить стан доступності сайту; у режимі 'bot' сайти перевіряють воркери, і їхній стан тут невідомий
+        if is_admin and RUN_MODE != 'bot':
+            text += f"   {quote_html(news_parser.get_health(site['name']).describe())}\n"
+        text += "\n"
+    if is_admin and RUN_MODE == 'bot':
+        text += "ℹ️ Стан сайтів відстежують воркери checker.py, дивіться їхні логи та метрики.\n"
 
     # Для адміністратора додати кнопки керування
-    if message.from_user.id == ADMIN_ID:
+    if is_admin:
         keyboard = InlineKeyboardMarkup()
         keyboard.add(InlineKeyboardButton("➕ Додати сайт", callback_data="add_site"))
         keyboard.add(InlineKeyboardButton("❌ Видалити сайт", callback_data="remove_site"))
@@ -480,6 +626,7 @@ async def process_base_url(message: types.Message, state: FSMContext):
         }
 
         news_parser.add_site(site_config)
+        site_scheduler.add_sites([site_config['name']])
 
     await state.finish()
     await message.answer(f"✅ Сайт '{data['name']}' успішно додано до моніторингу!")
@@ -520,6 +667,7 @@ async def delete_site(callback_query: types.CallbackQuery):
 
     site_name = callback_query.data.split(':', 1)[1]
     count = news_parser.remove_site(site_name)
+    site_scheduler.remove(site_name)
 
     await bot.answer_callback_query(callback_query.id)
     await bot.send_message(
@@ -529,12 +677,56 @@ async def delete_site(callback_query: types.CallbackQuery):
     )
 
 
+@dp.message_handler(commands=['stats'])
+async def cmd_stats(message: types.Message):
+    if message.from_user.id != ADMIN_ID:
+        await message.answer("⚠️ Ця функція доступна тільки адміністратору.")
+        return
+
+    text = "📊 <b>Статистика перевірки сайтів:</b>\n\n"
+    # У режимі 'bot' сайти завантажують воркери, тож лічильники цього процесу порожні
+    if RUN_MODE == 'bot':
+        text += "ℹ️ Сайти перевіряють воркери checker.py, їхня статистика - у логах"
+        if METRICS_PORT:
+            text += f" і метриках на портах від {METRICS_PORT + 1} (по одному на воркер)"
+        text += ".\n\n"
+    else:
+        for site in news_parser.sites_config:
+            name = site['name']
+            fetches, fetch_time = metrics.FETCH_SECONDS.summary(site=name)
+            parses, parse_time = metrics.PARSE_SECONDS.summary(site=name)
+            text += (
+                f"{hbold(name)}\n"
+                f"   завантажень: {fetches}, у середньому {fetch_time / fetches if fetches else 0:.2f} с, "
+                f"{metrics.FETCH_BYTES.get(site=name) / 1024:.0f} КБ\n"
+                f"   розборів: {parses}, у середньому {parse_time / parses if parses else 0:.3f} с\n"
+                f"   нових статей: {metrics.NEW_ARTICLES.get(site=name)}, "
+                f"пропущено повторів: {sum(metrics.DUPLICATES.get(site=name, reason=r) for r in ('url', 'title'))}\n\n"
+            )
+
+    sends, send_time = metrics.DELIVERY_SEND_SECONDS.summary()
+    delivered, latency = metrics.DELIVERY_LATENCY.summary()
+    errors = ', '.join(f"{dict(key)['type']}: {value}" for key, value in metrics.DELIVERY_ERRORS.values.items())
+    text += (
+        "📬 <b>Розсилка:</b>\n"
+        f"   надіслано: {metrics.DELIVERY_MESSAGES.get()}, запит у середньому {send_time / sends if sends else 0:.3f} с\n"
+        f"   у черзі: {metrics.DELIVERY_QUEUE.get()} чатів, в outbox: {outbox.pending} повідомлень\n"
+        f"   помилки: {errors or 'немає'}\n"
+        f"   від появи статті до розсилки: {latency / delivered if delivered else 0:.0f} с у середньому\n\n"
+        f"👥 Підписників: {len(subscribers_manager.get_subscribers())}, "
+        f"заблокували бота: {subscribers_manager.count_blocked()}"
+    )
+    await message.answer(text, parse_mode=ParseMode.HTML)
+
+
 @dp.message_handler(commands=['help'])
 async def cmd_help(message: types.Message):
     help_text = (
         "🤖 <b>Команди бота:</b>\n\n"
         "/start - Почати роботу з ботом\n"
         "/sites - Переглянути список сайтів, що відстежуються\n"
+        "/mysites - Обрати сайти, з яких надходитимуть новини\n"
+        "/keywords - Отримувати лише новини з певними словами\n"
         "/help - Показати цю довідку\n\n"
         "📰 <b>Підписка на новини:</b>\n"
         "Натисніть кнопку «Підписатися на новини», щоб отримувати сповіщення про нові публікації.\n\n"
@@ -548,18 +740,59 @@ async def cmd_help(message: types.Message):
             "В меню /sites ви можете:\n"
             "➕ Додати новий сайт для моніторингу\n"
             "❌ Видалити існуючий сайт\n"
+            "/stats - Статистика перевірки сайтів і розсилки\n"
         )
 
     await message.answer(help_text, parse_mode=ParseMode.HTML)
 
 
+# HTTP-сервер метрик Prometheus
+metrics_runner = None
+webhook_server = None
+
+
 # Функція для запуску бота
 async def on_startup(dp):
-    # Запуск завдання перевірки новин
-    asyncio.create_task(check_news_task())
+    global metrics_runner
+
+    # Запуск завдання перевірки новин або отримання статей від окремих воркерів
+    if RUN_MODE == 'bot':
+        asyncio.create_task(receive_articles_task())
+    else:
+        asyncio.create_task(check_news_task(news_parser, site_scheduler, publish_articles))
+        if DIGEST_MODE:
+            asyncio.create_task(flush_digest_task())
+    asyncio.create_task(deliver_outbox_task())
+    if METRICS_PORT:
+        metrics_runner = await metrics.start_metrics_server(METRICS_HOST, METRICS_PORT)
     logging.info("Бот запущено!")
 
 
+async def serve_webhook():
+    global webhook_server
+
+    webhook_server = WebhookServer(dp, WEBHOOK_PATH, secret=WEBHOOK_SECRET,
+                                   workers=WEBHOOK_WORKERS, queue_size=WEBHOOK_QUEUE_SIZE)
+    await webhook_server.start(WEBAPP_HOST, WEBAPP_PORT)
+    # Без WEBHOOK_HOST вебхук не реєструється: зручно для локальної перевірки записаними оновленнями
+    if WEBHOOK_HOST:
+        await bot.set_webhook(WEBHOOK_HOST + WEBHOOK_PATH, secret_token=WEBHOOK_SECRET)
+    await asyncio.Event().wait()
+
+
+async def on_shutdown(dp):
+    if webhook_server is not None:
+        await webhook_server.stop()
+    if metrics_runner is not None:
+        await metrics_runner.cleanup()
+    await news_parser.close()
+    outbox.close()
+    subscribers_manager.close()
+
+
 if __name__ == "__main__":
     # Запуск бота
-    executor.start_polling(dp, on_startup=on_startup, skip_updates=True)
+    if BOT_MODE == 'webhook':
+        executor.start(dp, serve_webhook(), on_startup=on_startup, on_shutdown=on_shutdown)
+    else:
+        executor.start_polling(dp, on_startup=on_startup, on_shutdown=on_shutdown, skip_updates=True)
@@ -0,0 +1,51 @@
+from collections import deque
+
+
+# Автомат Ахо-Корасік: пошук усіх ключових слів за один прохід по тексту,
+# незалежно від кількості слів і підписників
+class KeywordMatcher:
+    def __init__(self, keywords=()):
+        # Для кожного вузла: переходи, посилання невдачі та слова, що закінчуються в ньому
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [set()]
+        for keyword in keywords:
+            self.add(keyword)
+        self.build()
+
+    def add(self, keyword):
+        node = 0
+        for char in keyword:
+            next_node = self.goto[node].get(char)
+            if next_node is None:
+                next_node = len(self.goto)
+                self.goto[node][char] = next_node
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(set())
+            node = next_node
+        self.output[node].add(keyword)
+
+    def build(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.output[child] |= self.output[self.fail[child]]
+
+    def search(self, text):
+        """Повертає множину ключових слів, що трапляються в тексті."""
+        found = set()
+        node = 0
+        for char in text:
+            while node and char not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(char, 0)
+            if self.output[node]:
+                found |= self.output[node]
+        return found
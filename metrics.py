@@ -0,0 +1,152 @@
+import logging
+import time
+from aiohttp import web
+
+# Межі кошиків гістограм за замовчуванням (секунди)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 3600)
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels, extra=None):
+    items = list(labels)
+    if extra:
+        items.append(extra)
+    if not items:
+        return ''
+    return '{' + ','.join(f'{key}="{escape_label(value)}"' for key, value in items) + '}'
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, description):
+        self.name = name
+        self.description = description
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels):
+        return self.values.get(tuple(sorted(labels.items())), 0)
+
+    def render(self):
+        for key, value in self.values.items():
+            yield f"{self.name}{format_labels(key)} {value}"
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        self.values[tuple(sorted(labels.items()))] = value
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, description, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        # Для кожного набору міток: [лічильники кошиків, сума, кількість]
+        self.values = {}
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        data = self.values.get(key)
+        if data is None:
+            data = self.values[key] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                data[0][i] += 1
+        data[1] += value
+        data[2] += 1
+
+    def summary(self, **labels):
+        """Повертає (кількість, суму) спостережень."""
+        data = self.values.get(tuple(sorted(labels.items())))
+        return (data[2], data[1]) if data else (0, 0.0)
+
+    def render(self):
+        for key, (counts, total, count) in self.values.items():
+            for bound, bucket_count in zip(self.buckets, counts):
+                yield f"{self.name}_bucket{format_labels(key, ('le', bound))} {bucket_count}"
+            yield f"{self.name}_bucket{format_labels(key, ('le', '+Inf'))} {count}"
+            yield f"{self.name}_sum{format_labels(key)} {total}"
+            yield f"{self.name}_count{format_labels(key)} {count}"
+
+
+class Timer:
+    # Контекстний менеджер для вимірювання тривалості блоку коду
+    def __init__(self, histogram, **labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.started
+        self.histogram.observe(self.elapsed, **self.labels)
+        return False
+
+
+# Метрики перевірки сайтів
+FETCH_SECONDS = Histogram('news_fetch_seconds', 'Тривалість завантаження сторінки')
+FETCH_BYTES = Counter('news_fetch_bytes_total', 'Завантажено байтів')
+FETCH_RESPONSES = Counter('news_fetch_responses_total', 'Відповіді сайтів за статусом')
+PARSE_SECONDS = Histogram('news_parse_seconds', 'Тривалість розбору сторінки')
+ITEMS_MATCHED = Counter('news_items_matched_total', 'Елементів, знайдених селектором')
+NEW_ARTICLES = Counter('news_new_articles_total', 'Нових статей')
+DUPLICATES = Counter('news_duplicates_total', 'Пропущено повторів за причиною (url, title)')
+
+# Метрики розсилки
+DELIVERY_QUEUE = Gauge('delivery_queue_depth', 'Чатів у черзі розсилки')
+OUTBOX_PENDING = Gauge('delivery_outbox_pending', 'Нерозісланих пар (чат, повідомлення) в outbox')
+DELIVERY_SEND_SECONDS = Histogram('delivery_send_seconds', 'Тривалість запиту send_message')
+DELIVERY_MESSAGES = Counter('delivery_messages_total', 'Надіслано повідомлень')
+DELIVERY_ERRORS = Counter('delivery_errors_total', 'Помилки розсилки за типом')
+WEBHOOK_UPDATES = Counter('webhook_updates_total', 'Оновлення вебхука: прийняті та відхилені')
+WEBHOOK_QUEUE = Gauge('webhook_queue_depth', 'Оновлень вебхука в черзі на обробку')
+DELIVERY_LATENCY = Histogram('delivery_end_to_end_seconds', 'Час від першої появи статті до завершення розсилки')
+
+REGISTRY = [
+    FETCH_SECONDS, FETCH_BYTES, FETCH_RESPONSES, PARSE_SECONDS, ITEMS_MATCHED, NEW_ARTICLES, DUPLICATES,
+    DELIVERY_QUEUE, OUTBOX_PENDING, DELIVERY_SEND_SECONDS, DELIVERY_MESSAGES, DELIVERY_ERRORS, DELIVERY_LATENCY,
+    WEBHOOK_UPDATES, WEBHOOK_QUEUE,
+]
+
+
+def render():
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.description}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+async def handle_metrics(request):
+    return web.Response(text=render(), content_type='text/plain', charset='utf-8')
+
+
+async def start_metrics_server(host, port):
+    """Запускає HTTP-ендпоінт /metrics у форматі Prometheus. Повертає runner для зупинки."""
+    app = web.Application()
+    app.router.add_get('/metrics', handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host, port).start()
+    except OSError as e:
+        logging.error("Не вдалося запустити сервер метрик на %s:%s: %s", host, port, e)
+        await runner.cleanup()
+        return None
+    logging.info("Метрики доступні на http://%s:%s/metrics", host, port)
+    return runner
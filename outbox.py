@@ -0,0 +1,202 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+import metrics
+
+
+# Постійна черга розсилки. Кожне повідомлення зберігається один раз, а для кожного
+# отримувача - рядок (chat_id, message_id). Після надсилання рядки видаляються пакетами,
+# тож після перезапуску розсилка продовжується з місця зупинки.
+class Outbox:
+    def __init__(self, db_path='outbox.db', checkpoint_every=200, max_attempts=20):
+        self.db_path = db_path
+        self.checkpoint_every = checkpoint_every
+        # Невдалі спроби надіслати рядок (у пам'яті: після перезапуску лічба починається знову)
+        self.max_attempts = max_attempts
+        self.attempts = {}
+        self.conn = connect(db_path)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS messages ('
+            'id INTEGER PRIMARY KEY, text TEXT, first_seen REAL, site TEXT)'
+        )
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS outbox ('
+            'chat_id INTEGER, message_id INTEGER, PRIMARY KEY (chat_id, message_id)'
+            ') WITHOUT ROWID'
+        )
+        self.conn.execute('CREATE INDEX IF NOT EXISTS outbox_message ON outbox (message_id)')
+        # Статті, що чекають на завершення вікна дайджесту
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS held_articles (id INTEGER PRIMARY KEY, article TEXT, held_at REAL)'
+        )
+        # Статті, які передали воркери checker.py
+        self.conn.execute(CREATE_INCOMING)
+        self.conn.commit()
+        # Забрані з incoming_articles статті; видаляються в транзакції, що ставить їх у чергу
+        self.taken = []
+
+        self.pending = self.conn.execute('SELECT COUNT(*) FROM outbox').fetchone()[0]
+        # Оброблені, але ще не видалені з бази рядки
+        self.acked = []
+        self.event = None
+        metrics.OUTBOX_PENDING.set(self.pending)
+        if self.pending:
+            logging.info("В outbox %d нерозісланих повідомлень, продовжуємо розсилку", self.pending)
+
+    def get_event(self):
+        if self.event is None:
+            self.event = asyncio.Event()
+        return self.event
+
+    def enqueue(self, messages, routes, release_held=False):
+        """Додає розсилку однією транзакцією.
+
+        messages: список (текст, first_seen, сайт); routes: {chat_id: [індекс повідомлення, ...]}.
+        З release_held відкладені для дайджесту статті видаляються в тій самій транзакції.
+        """
+        used = set()
+        for indexes in routes.values():
+            used.update(indexes)
+        with self.conn:
+            # Повідомлення без отримувачів не зберігаємо
+            message_ids = {}
+            for i in sorted(used):
+                cursor = self.conn.execute('INSERT INTO messages (text, first_seen, site) VALUES (?, ?, ?)',
+                                           messages[i])
+                message_ids[i] = cursor.lastrowid
+            rows = [(chat_id, message_ids[i]) for chat_id, indexes in routes.items() for i in indexes]
+            added = self.conn.executemany('INSERT OR IGNORE INTO outbox VALUES (?, ?)', rows).rowcount
+            if release_held:
+                self.conn.execute('DELETE FROM held_articles')
+            self.delete_taken()
+        self.pending += added
+        metrics.OUTBOX_PENDING.set(self.pending)
+        if added:
+            self.get_event().set()
+        return added
+
+    def hold(self, articles):
+        with self.conn:
+            self.conn.executemany('INSERT INTO held_articles (article, held_at) VALUES (?, ?)',
+                                  ((json.dumps(article, ensure_ascii=False), time.time()) for article in articles))
+            self.delete_taken()
+
+    def take_incoming(self, limit):
+        """Статті від воркерів перевірки. Видаляються з бази разом із наступним enqueue або hold."""
+        rows = self.conn.execute(
+            'SELECT id, article FROM incoming_articles WHERE id > ? ORDER BY id LIMIT ?',
+            (self.taken[-1] if self.taken else 0, limit)
+        ).fetchall()
+        self.taken.extend(row_id for row_id, _ in rows)
+        return [json.loads(article) for _, article in rows]
+
+    def release_taken(self):
+        """Повертає взяті статті: після невдалої публікації наступний take_incoming прочитає їх знову."""
+        self.taken.clear()
+
+    def delete_taken(self):
+        if self.taken:
+            self.conn.executemany('DELETE FROM incoming_articles WHERE id = ?', [(row_id,) for row_id in self.taken])
+            self.taken.clear()
+
+    def held_articles(self):
+        """Відкладені статті та час, коли відкладено першу з них."""
+        rows = self.conn.execute('SELECT article, held_at FROM held_articles ORDER BY id').fetchall()
+        if not rows:
+            return [], None
+        return [json.loads(article) for article, _ in rows], rows[0][1]
+
+    def next_batch(self, max_chats):
+        """Наступні чати з чергою: {chat_id: [(message_id, текст), ...]} у порядку додавання."""
+        rows = self.conn.execute(
+            'SELECT o.chat_id, o.message_id, m.text FROM outbox o JOIN messages m ON m.id = o.message_id '
+            'WHERE o.chat_id IN (SELECT DISTINCT chat_id FROM outbox LIMIT ?) '
+            'ORDER BY o.chat_id, o.message_id',
+            (max_chats,)
+        ).fetchall()
+        batch = {}
+        for chat_id, message_id, text in rows:
+            batch.setdefault(chat_id, []).append((message_id, text))
+        return batch
+
+    def fail(self, chat_id, message_id):
+        """Тимчасова помилка надсилання: рядок залишається в черзі до max_attempts спроб."""
+        key = (chat_id, message_id)
+        attempts = self.attempts.get(key, 0) + 1
+        if attempts < self.max_attempts:
+            self.attempts[key] = attempts
+            return
+        logging.error("Повідомлення %s для чату %s не надіслано після %d спроб, видаляємо з черги",
+                      message_id, chat_id, attempts)
+        self.ack(chat_id, message_id)
+
+    def ack(self, chat_id, message_id):
+        self.attempts.pop((chat_id, message_id), None)
+        self.acked.append((chat_id, message_id))
+        if len(self.acked) >= self.checkpoint_every:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Видаляє оброблені рядки та повністю розіслані повідомлення."""
+        if not self.acked:
+            return
+        with self.conn:
+            removed = self.conn.executemany('DELETE FROM outbox WHERE chat_id = ? AND message_id = ?',
+                                            self.acked).rowcount
+            message_ids = sorted({message_id for _, message_id in self.acked})
+            placeholders = ','.join('?' * len(message_ids))
+            done = self.conn.execute(
+                f'SELECT id, first_seen, site FROM messages WHERE id IN ({placeholders}) '
+                'AND NOT EXISTS (SELECT 1 FROM outbox WHERE message_id = messages.id)',
+                message_ids
+            ).fetchall()
+            self.conn.executemany('DELETE FROM messages WHERE id = ?', [(row[0],) for row in done])
+        self.pending -= removed
+        self.acked.clear()
+        metrics.OUTBOX_PENDING.set(self.pending)
+
+        now = time.time()
+        for _, first_seen, site in done:
+            if first_seen:
+                metrics.DELIVERY_LATENCY.observe(now - first_seen, site=site or '')
+
+    async def wait(self):
+        event = self.get_event()
+        await event.wait()
+        event.clear()
+
+    def close(self):
+        self.checkpoint()
+        self.conn.close()
+
+
+CREATE_INCOMING = 'CREATE TABLE IF NOT EXISTS incoming_articles (id INTEGER PRIMARY KEY, article TEXT)'
+
+
+def connect(db_path):
+    # Базою одночасно користуються бот і воркери перевірки, тож чекаємо на блокування довше
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+# Черга нових статей від воркера checker.py до бота (таблиця в тій самій базі, що й outbox)
+class ArticleQueue:
+    def __init__(self, db_path='outbox.db'):
+        self.db_path = db_path
+        self.conn = connect(db_path)
+        self.conn.execute(CREATE_INCOMING)
+        self.conn.commit()
+
+    def push(self, articles):
+        if not articles:
+            return
+        with self.conn:
+            self.conn.executemany('INSERT INTO incoming_articles (article) VALUES (?)',
+                                  ((json.dumps(article, ensure_ascii=False),) for article in articles))
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,67 @@
+import asyncio
+import heapq
+import random
+import time
+
+
+# Планувальник перевірок: у кожного сайту свій час наступної перевірки
+class SiteScheduler:
+    def __init__(self, default_interval, min_interval=60, max_interval=3600,
+                 articles_per_check=0.5, history_days=7):
+        self.default_interval = default_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.articles_per_check = articles_per_check
+        self.history_days = history_days
+        # Купа (час, сайт); застарілі записи відкидаються за словником due
+        self.heap = []
+        self.due = {}
+        self.wakeup = asyncio.Event()
+
+    def schedule(self, site_name, delay):
+        due = time.monotonic() + delay
+        self.due[site_name] = due
+        heapq.heappush(self.heap, (due, site_name))
+        self.wakeup.set()
+
+    def add_sites(self, site_names):
+        # Перші перевірки розподіляємо випадково, щоб не запитувати всі сайти одночасно
+        spread = min(self.min_interval, self.default_interval)
+        for site_name in site_names:
+            self.schedule(site_name, random.uniform(0, spread))
+
+    def remove(self, site_name):
+        self.due.pop(site_name, None)
+
+    def interval_for(self, site_config, recent_articles):
+        """Інтервал перевірки за кількістю нових статей сайту за останні history_days днів."""
+        if site_config.get('check_interval'):
+            return site_config['check_interval']
+
+        low = site_config.get('min_interval', self.min_interval)
+        high = site_config.get('max_interval', self.max_interval)
+        if not recent_articles:
+            # Тихий або неробочий сайт перевіряємо найрідше: інтервал лише зростає зі спадом активності
+            return high
+        rate = recent_articles / (self.history_days * 86400)
+        return max(low, min(high, self.articles_per_check / rate))
+
+    async def next_site(self):
+        """Чекає, доки настане час перевірки якогось сайту, і повертає його назву."""
+        while True:
+            while self.heap and self.due.get(self.heap[0][1]) != self.heap[0][0]:
+                heapq.heappop(self.heap)
+
+            timeout = None
+            if self.heap:
+                timeout = self.heap[0][0] - time.monotonic()
+                if timeout <= 0:
+                    _, site_name = heapq.heappop(self.heap)
+                    del self.due[site_name]
+                    return site_name
+
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
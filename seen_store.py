@@ -0,0 +1,254 @@
+import json
+import logging
+import os
+import sqlite3
+from datetime import datetime
+
+
+# Базовий інтерфейс сховища переглянутих новин
+class SeenNewsStore:
+    def __contains__(self, news_id):
+        raise NotImplementedError
+
+    def add(self, news_id, site, title, link, first_seen=None):
+        raise NotImplementedError
+
+    def get(self, news_id):
+        raise NotImplementedError
+
+    def iter_ids(self):
+        raise NotImplementedError
+
+    def count_since(self, site, since):
+        """Кількість новин сайту, вперше побачених після since."""
+        raise NotImplementedError
+
+    def recent_titles(self, site, limit):
+        """Заголовки останніх limit збережених новин сайту."""
+        raise NotImplementedError
+
+    def discard(self, site):
+        """Відкидає незбережені новини сайту (їх не вдалося опублікувати). Повертає їхні (news_id, link)."""
+        raise NotImplementedError
+
+    def commit(self, site=None):
+        """Зберігає новини сайту site (або всіх сайтів), додані з моменту попереднього виклику."""
+        raise NotImplementedError
+
+    def purge(self, older_than):
+        """Видаляє новини, вперше побачені раніше за older_than. Повертає кількість видалених."""
+        raise NotImplementedError
+
+    def close(self):
+        # Незбережені новини належать перевіркам, що не дійшли до публікації: їх повторить наступний запуск
+        pass
+
+
+# Старий формат: весь словник у JSON, перезаписується повністю при кожному збереженні
+class JsonSeenNewsStore(SeenNewsStore):
+    def __init__(self, file_path='seen_news.json'):
+        self.file_path = file_path
+        self.seen_news = self.load()
+        # Новини, ще не записані у файл, окремо для кожного сайту
+        self.pending = {}
+        self.dirty = False
+
+    def load(self):
+        if os.path.exists(self.file_path):
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {}
+
+    def __contains__(self, news_id):
+        return news_id in self.seen_news or any(news_id in rows for rows in self.pending.values())
+
+    def add(self, news_id, site, title, link, first_seen=None):
+        self.pending.setdefault(site, {})[news_id] = {
+            'title': title,
+            'link': link,
+            'first_seen': first_seen or datetime.now().isoformat()
+        }
+
+    def get(self, news_id):
+        for rows in self.pending.values():
+            if news_id in rows:
+                return rows[news_id]
+        return self.seen_news.get(news_id)
+
+    def iter_ids(self):
+        yield from self.seen_news
+        for rows in list(self.pending.values()):
+            yield from list(rows)
+
+    def count_since(self, site, since):
+        prefix = f"{site}:"
+        threshold = since.isoformat()
+        return sum(1 for news_id, data in self.seen_news.items()
+                   if news_id.startswith(prefix) and data.get('first_seen', '') >= threshold)
+
+    def recent_titles(self, site, limit):
+        prefix = f"{site}:"
+        rows = sorted((data.get('first_seen', ''), data.get('title', ''))
+                      for news_id, data in self.seen_news.items() if news_id.startswith(prefix))
+        return [title for _, title in rows[-limit:]]
+
+    def discard(self, site):
+        return [(news_id, data['link']) for news_id, data in self.pending.pop(site, {}).items()]
+
+    def commit(self, site=None):
+        for name in (list(self.pending) if site is None else [site]):
+            rows = self.pending.pop(name, None)
+            if rows:
+                self.seen_news.update(rows)
+                self.dirty = True
+        if not self.dirty:
+            return
+        with open(self.file_path, 'w', encoding='utf-8') as f:
+            json.dump(self.seen_news, f, ensure_ascii=False, indent=2)
+        self.dirty = False
+
+    def purge(self, older_than):
+        threshold = older_than.isoformat()
+        expired = [news_id for news_id, data in self.seen_news.items()
+                   if data.get('first_seen', '') < threshold]
+        for news_id in expired:
+            del self.seen_news[news_id]
+        if expired:
+            self.dirty = True
+        return len(expired)
+
+
+# SQLite: запис лише нових рядків однією транзакцією за цикл, без завантаження історії в пам'ять
+class SqliteSeenNewsStore(SeenNewsStore):
+    def __init__(self, db_path='seen_news.db', legacy_json_file=None):
+        self.db_path = db_path
+        # Воркери відкривають ту саму базу одночасно, тож чекаємо на блокування довше за типове
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS seen_news ('
+            'news_id TEXT PRIMARY KEY, site TEXT, title TEXT, link TEXT, first_seen TEXT'
+            ') WITHOUT ROWID'
+        )
+        self.conn.execute('CREATE INDEX IF NOT EXISTS seen_news_first_seen ON seen_news (first_seen)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS seen_news_site ON seen_news (site, first_seen)')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS migrations (name TEXT PRIMARY KEY)')
+        self.conn.commit()
+        # Новини поточного циклу, ще не записані в базу, окремо для кожного сайту
+        self.pending = {}
+
+        if legacy_json_file and os.path.exists(legacy_json_file):
+            self.migrate_json(legacy_json_file)
+
+    def migrate_json(self, file_path):
+        # Кілька воркерів можуть стартувати одночасно: міграцію виконує той, хто першим узяв блокування запису,
+        # решта бачать позначку в таблиці migrations і пропускають її
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            if self.conn.execute("SELECT 1 FROM migrations WHERE name = 'seen_news_json'").fetchone():
+                self.conn.rollback()
+                return
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    seen_news = json.load(f)
+            except FileNotFoundError:
+                self.conn.rollback()
+                return
+
+            rows = []
+            for news_id, data in seen_news.items():
+                link = data.get('link', '')
+                # Ідентифікатор має вигляд "{site}:{link}"
+                site = news_id[:-len(link) - 1] if link and news_id.endswith(link) else news_id.split(':', 1)[0]
+                rows.append((news_id, site, data.get('title', ''), link, data.get('first_seen', '')))
+
+            self.conn.executemany('INSERT OR IGNORE INTO seen_news VALUES (?, ?, ?, ?, ?)', rows)
+            self.conn.execute("INSERT INTO migrations VALUES ('seen_news_json')")
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+
+        # Перейменовуємо файл, щоб його не підхопив JSON-бекенд чи ручний перегляд
+        try:
+            os.replace(file_path, file_path + '.migrated')
+        except FileNotFoundError:
+            pass
+        logging.info("Перенесено %d новин з %s до %s", len(rows), file_path, self.db_path)
+
+    def pending_row(self, news_id):
+        for rows in self.pending.values():
+            row = rows.get(news_id)
+            if row is not None:
+                return row
+        return None
+
+    def __contains__(self, news_id):
+        if self.pending_row(news_id) is not None:
+            return True
+        row = self.conn.execute('SELECT 1 FROM seen_news WHERE news_id = ?', (news_id,)).fetchone()
+        return row is not None
+
+    def add(self, news_id, site, title, link, first_seen=None):
+        self.pending.setdefault(site, {})[news_id] = (news_id, site, title, link,
+                                                      first_seen or datetime.now().isoformat())
+
+    def get(self, news_id):
+        row = self.pending_row(news_id)
+        if row is None:
+            row = self.conn.execute(
+                'SELECT news_id, site, title, link, first_seen FROM seen_news WHERE news_id = ?',
+                (news_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {'title': row[2], 'link': row[3], 'first_seen': row[4]}
+
+    def iter_ids(self):
+        # Курсор читає рядки поступово, без завантаження всієї таблиці
+        for (news_id,) in self.conn.execute('SELECT news_id FROM seen_news'):
+            yield news_id
+        for rows in list(self.pending.values()):
+            yield from list(rows)
+
+    def count_since(self, site, since):
+        row = self.conn.execute(
+            'SELECT COUNT(*) FROM seen_news WHERE site = ? AND first_seen >= ?',
+            (site, since.isoformat())
+        ).fetchone()
+        return row[0]
+
+    def recent_titles(self, site, limit):
+        rows = self.conn.execute(
+            'SELECT title FROM seen_news WHERE site = ? ORDER BY first_seen DESC LIMIT ?', (site, limit)
+        ).fetchall()
+        return [title for (title,) in rows]
+
+    def discard(self, site):
+        return [(row[0], row[3]) for row in self.pending.pop(site, {}).values()]
+
+    def commit(self, site=None):
+        # Лише новини сайту, статті якого вже опубліковано: рядки інших перевірок чекають своєї публікації
+        sites = [name for name in (self.pending if site is None else [site]) if self.pending.get(name)]
+        if not sites:
+            return
+        with self.conn:
+            self.conn.executemany('INSERT OR IGNORE INTO seen_news VALUES (?, ?, ?, ?, ?)',
+                                  [row for name in sites for row in self.pending[name].values()])
+        for name in sites:
+            del self.pending[name]
+
+    def purge(self, older_than):
+        with self.conn:
+            cursor = self.conn.execute('DELETE FROM seen_news WHERE first_seen < ?', (older_than.isoformat(),))
+        return cursor.rowcount
+
+    def close(self):
+        self.conn.close()
+
+
+def open_seen_store(backend='sqlite', json_file='seen_news.json', db_file='seen_news.db'):
+    if backend == 'json':
+        return JsonSeenNewsStore(json_file)
+    return SqliteSeenNewsStore(db_file, legacy_json_file=json_file)
@@ -0,0 +1,122 @@
+# Налаштування за замовчуванням. Будь-яке значення можна перевизначити в config.py
+
+# Бекенд для розбору HTML: 'auto', 'selectolax', 'lxml' або 'html.parser'
+HTML_BACKEND = 'auto'
+
+# Де виконувати розбір сторінок: 'thread', 'process' або 'none' (у циклі подій)
+PARSE_EXECUTOR = 'thread'
+# Максимальна кількість робочих потоків чи процесів для розбору
+PARSE_WORKERS = 4
+
+# Розсилка: кількість паралельних воркерів, глобальний ліміт Telegram (повідомлень/с)
+# та мінімальний інтервал між повідомленнями в одному чаті (с)
+DELIVERY_CONCURRENCY = 30
+DELIVERY_GLOBAL_RATE = 30
+DELIVERY_PER_CHAT_INTERVAL = 1.0
+
+# Outbox: розсилка переживає перезапуск. Скільки чатів брати з черги за раз і через скільки
+# оброблених повідомлень видаляти їх з бази (стільки повідомлень можуть повторитися після збою).
+# Швидкість розбору черги задає DELIVERY_GLOBAL_RATE
+OUTBOX_BATCH_CHATS = 1000
+OUTBOX_CHECKPOINT_EVERY = 200
+# Після тимчасових помилок (мережа, 5xx Telegram) повідомлення залишається в черзі;
+# після скількох невдалих спроб поспіль його видаляти
+OUTBOX_MAX_ATTEMPTS = 20
+
+# Режим дайджесту: нові статті об'єднуються в мінімальну кількість повідомлень
+DIGEST_MODE = False
+# Скільки секунд накопичувати статті перед відправкою дайджесту. Сайти перевіряються кожен
+# за своїм розкладом, тож 0 означає окремий дайджест після кожної перевірки сайту з новинами
+DIGEST_WINDOW = 600
+
+# Сховище переглянутих новин: 'sqlite' або 'json' (старий формат)
+SEEN_NEWS_BACKEND = 'sqlite'
+# Скільки днів зберігати переглянуті новини (0 - без обмеження)
+SEEN_NEWS_TTL_DAYS = 0
+
+# Індекс переглянутих новин у пам'яті: максимум відбитків на сайт
+# та очікувана кількість записів для фільтра Блума (0 - без фільтра)
+DEDUP_CAPACITY_PER_SITE = 10000
+DEDUP_BLOOM_CAPACITY = 0
+
+# Повтори між сайтами: максимальна відстань Геммінга між SimHash заголовків (з 64 біт)
+# та вікно (с), протягом якого нова стаття порівнюється зі статтями інших сайтів.
+# 0 у вікні - вимкнено: позначені повтори не надсилаються, а схожі шаблонні заголовки
+# різних новин теж можуть збігтися, тож вмикайте свідомо (наприклад, 24 * 3600)
+NEAR_DUPLICATE_DISTANCE = 1
+NEAR_DUPLICATE_WINDOW = 0
+
+# Планувальник: межі інтервалу перевірки сайту (с), скільки нових статей очікувати
+# за одну перевірку та за скільки днів рахувати частоту публікацій.
+# Для окремого сайту в sites_config.json можна задати check_interval, min_interval, max_interval
+SCHEDULER_MIN_INTERVAL = 60
+SCHEDULER_MAX_INTERVAL = 3600
+SCHEDULER_ARTICLES_PER_CHECK = 0.5
+SCHEDULER_HISTORY_DAYS = 7
+
+# HTTP-клієнт: загальний ліміт з'єднань і ліміт на один хост, час кешування DNS (с),
+# час утримання keep-alive з'єднань (с) та окремі тайм-аути з'єднання і читання (с)
+HTTP_OPTIONS = {
+    'limit': 100,
+    'limit_per_host': 2,
+    'dns_cache_ttl': 300,
+    'keepalive_timeout': 60,
+    'connect_timeout': 5,
+    'read_timeout': 15,
+    'total_timeout': 30,
+}
+
+# Стан сайтів: після скількох помилок поспіль (або перевірок без жодного елемента)
+# сайт тимчасово вимикається, базова та максимальна затримка між спробами (с)
+HEALTH_OPTIONS = {
+    'failure_threshold': 3,
+    'empty_threshold': 5,
+    'backoff_base': 60,
+    'backoff_max': 6 * 3600,
+}
+
+# Ендпоінт метрик Prometheus (/metrics); 0 - вимкнено
+METRICS_HOST = '127.0.0.1'
+METRICS_PORT = 9108
+
+# Журнал: рівень, необов'язковий файл та формат JSON-рядків замість звичайного тексту
+LOG_LEVEL = 'INFO'
+LOG_FILE = None
+LOG_JSON = False
+
+# Максимальний розмір сторінки, що завантажується (байтів)
+FETCH_MAX_BYTES = 5 * 1024 * 1024
+
+# Після скількох невдалих запитів поспіль забувати знайдену автоматично RSS/Atom-стрічку
+# (після відповіді 4xx вона забувається одразу)
+FEED_MAX_FAILURES = 3
+
+# Сховище підписників: 'sqlite' або 'json'; затримка (с), протягом якої зміни зливаються в один запис
+SUBSCRIBERS_BACKEND = 'sqlite'
+SUBSCRIBERS_SAVE_DELAY = 2
+
+# Режим запуску main.py: 'all' - бот сам перевіряє сайти (один процес);
+# 'bot' - лише бот і розсилка, сайти перевіряють воркери: python checker.py --shards N
+RUN_MODE = 'all'
+# Скільки статей від воркерів забирати за раз і як часто перевіряти чергу (с)
+HANDOFF_BATCH = 500
+HANDOFF_POLL_INTERVAL = 1
+# Як часто воркери перечитують sites_config.json, щоб побачити додані чи видалені сайти (с)
+CONFIG_RELOAD_INTERVAL = 30
+
+# Отримання оновлень: 'polling' або 'webhook'. Для вебхука WEBHOOK_HOST - публічна https-адреса
+# (наприклад, 'https://bot.example.com'), а веб-сервер слухає WEBAPP_HOST:WEBAPP_PORT за проксі.
+# Оновлення обробляють WEBHOOK_WORKERS воркерів, у чергах не більше WEBHOOK_QUEUE_SIZE оновлень
+BOT_MODE = 'polling'
+WEBHOOK_HOST = ''
+WEBHOOK_PATH = '/webhook'
+WEBHOOK_SECRET = None
+WEBAPP_HOST = '127.0.0.1'
+WEBAPP_PORT = 8080
+WEBHOOK_WORKERS = 16
+WEBHOOK_QUEUE_SIZE = 1000
+
+# Сховище станів діалогів (FSM): 'sqlite', 'json' або 'memory' (втрачається при перезапуску)
+FSM_STORAGE = 'sqlite'
+
+from config import *
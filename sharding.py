@@ -0,0 +1,23 @@
+import hashlib
+from bisect import bisect
+
+
+def ring_hash(key):
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+# Консистентне хешування назв сайтів між воркерами перевірки: при зміні кількості
+# воркерів переїжджає лише приблизно 1/N сайтів, а не весь розподіл
+class HashRing:
+    def __init__(self, shards, replicas=100):
+        self.shards = shards
+        points = sorted((ring_hash(f"{shard}:{replica}"), shard)
+                        for shard in range(shards) for replica in range(replicas))
+        self.points = [point for point, _ in points]
+        self.owners = [shard for _, shard in points]
+
+    def shard_for(self, site_name):
+        if self.shards <= 1:
+            return 0
+        i = bisect(self.points, ring_hash(site_name)) % len(self.points)
+        return self.owners[i]
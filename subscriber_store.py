@@ -0,0 +1,178 @@
+import json
+import logging
+import os
+import sqlite3
+from datetime import datetime
+
+
+def write_json_atomic(file_path, data, indent=None):
+    # Пишемо у тимчасовий файл і підміняємо ним старий, щоб збій посеред запису не зіпсував дані
+    tmp_path = f"{file_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        if indent is None:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        else:
+            json.dump(data, f, ensure_ascii=False, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, file_path)
+
+
+def new_record(joined=None):
+    return {'joined': joined or datetime.now().isoformat(), 'blocked': False, 'last_delivery': None}
+
+
+# Базовий інтерфейс сховища підписників.
+# Активні (не заблоковані) підписники завжди тримаються в пам'яті як множина,
+# тож перевірка членства та отримання списку не залежать від кількості підписників.
+class SubscriberStore:
+    def __init__(self):
+        self.records = {}
+        self.active = set()
+        # Змінені з моменту останнього commit записи
+        self.dirty = set()
+
+    def __contains__(self, user_id):
+        return user_id in self.active
+
+    def __len__(self):
+        return len(self.active)
+
+    def get(self, user_id):
+        return self.records.get(user_id)
+
+    def add(self, user_id):
+        """Додає або повертає заблокованого підписника. Повертає False, якщо він уже активний."""
+        if user_id in self.active:
+            return False
+        record = self.records.get(user_id)
+        if record is None:
+            self.records[user_id] = new_record()
+        else:
+            record['blocked'] = False
+        self.active.add(user_id)
+        self.dirty.add(user_id)
+        return True
+
+    def remove(self, user_id):
+        if user_id not in self.records:
+            return False
+        del self.records[user_id]
+        self.active.discard(user_id)
+        self.dirty.add(user_id)
+        return True
+
+    def set_blocked(self, user_id):
+        record = self.records.get(user_id)
+        if record is None or record['blocked']:
+            return False
+        record['blocked'] = True
+        self.active.discard(user_id)
+        self.dirty.add(user_id)
+        return True
+
+    def record_delivery(self, user_id, when=None):
+        record = self.records.get(user_id)
+        if record is not None:
+            record['last_delivery'] = when or datetime.now().isoformat()
+            self.dirty.add(user_id)
+
+    def count_blocked(self):
+        return len(self.records) - len(self.active)
+
+    def commit(self):
+        """Зберігає зміни, накопичені з моменту попереднього виклику."""
+        raise NotImplementedError
+
+    def close(self):
+        self.commit()
+
+    def load_records(self, records):
+        self.records = records
+        self.active = {user_id for user_id, record in records.items() if not record['blocked']}
+
+
+def load_legacy_json(file_path):
+    """Читає subscribers.json: старий формат (список id) або новий (словник з метаданими)."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        return {int(user_id): new_record() for user_id in data}
+    return {int(user_id): dict(new_record(), **record) for user_id, record in data.items()}
+
+
+# JSON-файл: увесь словник перезаписується атомарно, але лише коли є зміни
+class JsonSubscriberStore(SubscriberStore):
+    def __init__(self, file_path='subscribers.json'):
+        super().__init__()
+        self.file_path = file_path
+        if os.path.exists(file_path):
+            self.load_records(load_legacy_json(file_path))
+
+    def commit(self):
+        if not self.dirty:
+            return
+        write_json_atomic(self.file_path, {str(user_id): record for user_id, record in self.records.items()})
+        self.dirty.clear()
+
+
+# SQLite: записуються лише змінені рядки однією транзакцією
+class SqliteSubscriberStore(SubscriberStore):
+    def __init__(self, db_path='subscribers.db', legacy_json_file=None):
+        super().__init__()
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS subscribers ('
+            'user_id INTEGER PRIMARY KEY, joined TEXT, blocked INTEGER, last_delivery TEXT'
+            ')'
+        )
+        self.conn.commit()
+
+        if legacy_json_file and os.path.exists(legacy_json_file):
+            self.migrate_json(legacy_json_file)
+
+        records = {}
+        for user_id, joined, blocked, last_delivery in self.conn.execute(
+                'SELECT user_id, joined, blocked, last_delivery FROM subscribers'):
+            records[user_id] = {'joined': joined, 'blocked': bool(blocked), 'last_delivery': last_delivery}
+        self.load_records(records)
+
+    def migrate_json(self, file_path):
+        records = load_legacy_json(file_path)
+        with self.conn:
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO subscribers VALUES (?, ?, ?, ?)',
+                ((user_id, r['joined'], int(r['blocked']), r['last_delivery']) for user_id, r in records.items())
+            )
+        # Перейменовуємо файл, щоб міграція виконалася лише один раз
+        os.replace(file_path, file_path + '.migrated')
+        logging.info("Перенесено %d підписників з %s до %s", len(records), file_path, self.db_path)
+
+    def commit(self):
+        if not self.dirty:
+            return
+        upserts = []
+        deletes = []
+        for user_id in self.dirty:
+            record = self.records.get(user_id)
+            if record is None:
+                deletes.append((user_id,))
+            else:
+                upserts.append((user_id, record['joined'], int(record['blocked']), record['last_delivery']))
+        with self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO subscribers VALUES (?, ?, ?, ?)', upserts)
+            self.conn.executemany('DELETE FROM subscribers WHERE user_id = ?', deletes)
+        self.dirty.clear()
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+
+def open_subscriber_store(backend='sqlite', json_file='subscribers.json', db_file='subscribers.db'):
+    if backend == 'json':
+        return JsonSubscriberStore(json_file)
+    return SqliteSubscriberStore(db_file, legacy_json_file=json_file)
@@ -0,0 +1,34 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dedup import NearDuplicateIndex, canonical_url
+
+
+def test_templated_titles_are_not_duplicates():
+    index = NearDuplicateIndex(window=24 * 3600)
+    titles = [f"Синтетична новина номер {i} про дизайн та технології" for i in range(600)]
+    titles += [f"Курс валют на {day} жовтня: долар подешевшав" for day in range(1, 32)]
+    # Два сайти з однаковими шаблонами, але різними новинами
+    reasons = [index.check_and_add(f"https://{site}.example/{i}", title, site, now=0)
+               for site in ('a', 'b') for i, title in enumerate(titles) if (i % 2 == 0) == (site == 'a')]
+    assert reasons.count('title') == 0
+
+
+def test_same_site_titles_are_not_compared():
+    index = NearDuplicateIndex(window=24 * 3600)
+    title = "Monobank запустив нову функцію для ФОП"
+    assert index.check_and_add('https://a.example/1', title, 'a', now=0) is None
+    assert index.check_and_add('https://a.example/2', title, 'a', now=1) is None
+
+
+def test_cross_site_duplicates():
+    index = NearDuplicateIndex(window=24 * 3600)
+    assert index.check_and_add('https://a.example/1', "ЄС ухвалив нові правила для AI-моделей", 'a', now=0) is None
+    assert index.check_and_add('https://b.example/7', "ЄС ухвалив нові правила для AI моделей!", 'b', now=1) == 'title'
+    link = canonical_url('http://www.a.example/1/?utm_source=tg')
+    assert index.check_and_add(link, "Зовсім інший заголовок цієї новини", 'c', now=2) == 'url'
+    # Після вікна записи забуваються
+    assert index.check_and_add('https://c.example/9', "ЄС ухвалив нові правила для AI-моделей", 'c',
+                               now=24 * 3600 + 10) is None
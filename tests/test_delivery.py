@@ -0,0 +1,87 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiogram.utils.exceptions import NetworkError, BadRequest, BotBlocked
+
+from delivery import DeliveryEngine, FAILED
+from outbox import Outbox
+
+
+class FlakyBot:
+    def __init__(self):
+        self.errors = {}
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        error = self.errors.get(chat_id)
+        if error is not None:
+            raise error
+        self.sent.append((chat_id, text))
+
+
+class Subscribers:
+    def __init__(self):
+        self.blocked = set()
+        self.delivered = set()
+
+    def mark_blocked(self, chat_id):
+        self.blocked.add(chat_id)
+
+    def record_delivery(self, chat_id):
+        self.delivered.add(chat_id)
+
+
+def deliver_batch(outbox, engine):
+    batch = outbox.next_batch(100)
+
+    def on_done(chat_id, i, status):
+        message_id = batch[chat_id][i][0]
+        if status == FAILED:
+            outbox.fail(chat_id, message_id)
+        else:
+            outbox.ack(chat_id, message_id)
+
+    stats = asyncio.run(engine.deliver({chat_id: [text for _, text in items] for chat_id, items in batch.items()},
+                                       on_done=on_done))
+    outbox.checkpoint()
+    return stats
+
+
+def test_transient_errors_keep_messages_in_outbox(tmp_path):
+    outbox = Outbox(str(tmp_path / 'outbox.db'), max_attempts=3)
+    outbox.enqueue([('перша', None, 'S'), ('друга', None, 'S')], {1: [0, 1], 2: [0, 1], 3: [0, 1], 4: [0, 1]})
+    bot = FlakyBot()
+    subscribers = Subscribers()
+    engine = DeliveryEngine(bot, subscribers, per_chat_interval=0)
+
+    bot.errors = {1: NetworkError('connection reset'), 2: BotBlocked('Forbidden: bot was blocked by the user'),
+                  3: BadRequest("Can't parse entities")}
+    stats = deliver_batch(outbox, engine)
+    assert stats['failed'] == 1 and stats['unreachable'] == 1 and stats['rejected'] == 2
+    # Недоступний чат і відхилені повідомлення знято з черги, тимчасову помилку - ні
+    assert outbox.pending == 2
+    assert sorted(outbox.next_batch(100)) == [1]
+    assert subscribers.blocked == {2}
+    assert 1 not in subscribers.delivered
+
+    bot.errors = {}
+    deliver_batch(outbox, engine)
+    assert outbox.pending == 0
+    assert [text for chat_id, text in bot.sent if chat_id == 1] == ['перша', 'друга']
+    outbox.close()
+
+
+def test_row_dropped_after_max_attempts(tmp_path):
+    outbox = Outbox(str(tmp_path / 'outbox.db'), max_attempts=2)
+    outbox.enqueue([('текст', None, 'S')], {1: [0]})
+    bot = FlakyBot()
+    bot.errors = {1: NetworkError('timeout')}
+    engine = DeliveryEngine(bot, Subscribers(), per_chat_interval=0)
+    deliver_batch(outbox, engine)
+    assert outbox.pending == 1
+    deliver_batch(outbox, engine)
+    assert outbox.pending == 0
+    outbox.close()
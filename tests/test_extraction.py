@@ -0,0 +1,85 @@
+"""Паритет бекендів HTML: усі бекенди мають вилучати ті самі статті, що й html.parser.
+
+Сторінки лежать у tests/pages (HTML і конфігурація сайту поруч, як у benchmarks/snapshots);
+збережені бенчмарком сторінки, якщо вони є, перевіряються так само.
+"""
+import json
+import os
+import sys
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(TESTS_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from extraction import compile_site, get_backend, available_backends
+
+PAGE_DIRS = [os.path.join(TESTS_DIR, 'pages'), os.path.join(ROOT_DIR, 'benchmarks', 'snapshots')]
+
+
+def load_pages():
+    pages = []
+    for pages_dir in PAGE_DIRS:
+        if not os.path.isdir(pages_dir):
+            continue
+        for file_name in sorted(os.listdir(pages_dir)):
+            if not file_name.endswith('.json'):
+                continue
+            with open(os.path.join(pages_dir, file_name), 'r', encoding='utf-8') as f:
+                site_config = json.load(f)
+            # Кілька конфігурацій можуть ділити одну сторінку
+            page_name = site_config.pop('page', f"{file_name[:-5]}.html")
+            page_path = os.path.join(pages_dir, page_name)
+            if not os.path.exists(page_path):
+                continue
+            with open(page_path, 'rb') as f:
+                html = f.read().decode('utf-8', errors='replace')
+            pages.append(pytest.param(site_config, html, id=file_name[:-5]))
+    return pages
+
+
+def extract(backend_name, site_config, html):
+    return compile_site(site_config, get_backend(backend_name)).extract(html)
+
+
+FAST_BACKENDS = [name for name in available_backends() if name != 'html.parser']
+
+
+@pytest.mark.parametrize('backend_name', FAST_BACKENDS)
+@pytest.mark.parametrize('site_config, html', load_pages())
+def test_backend_matches_html_parser(backend_name, site_config, html):
+    assert extract(backend_name, site_config, html) == extract('html.parser', site_config, html)
+
+
+@pytest.mark.parametrize('backend_name', available_backends())
+def test_select_does_not_match_item_itself(backend_name):
+    with open(os.path.join(TESTS_DIR, 'pages', 'self_match.html'), encoding='utf-8') as f:
+        html = f.read()
+    site_config = {
+        'name': 'Self match', 'url': 'https://example.com/', 'selector': 'p.self, a.self',
+        'link_attr': 'select:a', 'base_url': 'https://example.com'
+    }
+    found, articles = extract(backend_name, site_config, html)
+    # Посилання-елемент не має вкладеного <a>, тож пропускається; текст <script> не входить у заголовок
+    assert found == 3
+    assert articles == [{'site': 'Self match', 'title': 'Картка чотири читати', 'link': 'https://example.com/news/4'}]
+
+
+@pytest.mark.parametrize('backend_name', available_backends())
+def test_text_skips_script_and_style(backend_name):
+    html = ('<ul><li><a href="/1">Один<script>var a = "<b>";</script> &amp; '
+            '<style>.x{}</style><!-- коментар -->два</a></li></ul>')
+    site_config = {'name': 'S', 'url': 'https://example.com/', 'selector': 'li a'}
+    assert extract(backend_name, site_config, html) == (1, [{'site': 'S', 'title': 'Один & два', 'link': '/1'}])
+
+
+@pytest.mark.parametrize('backend_name', available_backends())
+def test_next_page_link(backend_name):
+    html = '<div class="n"><a href="/a/1">Новина</a></div><a class="next" href="?page=2">Далі</a>'
+    site_config = {'name': 'S', 'url': 'https://example.com/news', 'selector': 'div.n',
+                   'next_page_selector': 'a.next'}
+    plan = compile_site(site_config, get_backend(backend_name))
+    found, articles, next_url = plan.extract_page(html, 'https://example.com/news')
+    assert found == 1
+    assert next_url == 'https://example.com/news?page=2'
@@ -0,0 +1,89 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from checking import NewsParser
+
+
+def make_parser(tmp_path, site_config):
+    (tmp_path / 'sites_config.json').write_text(json.dumps([site_config]), encoding='utf-8')
+    return NewsParser(
+        sites_config_file=str(tmp_path / 'sites_config.json'),
+        seen_db_file=str(tmp_path / 'seen_news.db'),
+        seen_news_file=str(tmp_path / 'seen_news.json'),
+        validators_file=str(tmp_path / 'site_validators.json'),
+        feeds_file=str(tmp_path / 'site_feeds.json'),
+        parse_executor=None,
+        feed_max_failures=3
+    )
+
+
+def test_discovered_feed_forgotten_after_client_error(tmp_path):
+    parser = make_parser(tmp_path, {'name': 'S', 'url': 'https://s.example/', 'selector': 'a'})
+    plan = parser.site_plans['S']
+    parser.site_feeds['S'] = 'https://s.example/feed'
+
+    parser.feed_failed(plan, 'https://s.example/feed', 429)
+    assert parser.site_feeds['S'] == 'https://s.example/feed'
+    parser.feed_failed(plan, 'https://s.example/feed', 404)
+    assert parser.site_feeds['S'] is None
+    parser.seen_news.close()
+
+
+def test_discovered_feed_forgotten_after_repeated_failures(tmp_path):
+    parser = make_parser(tmp_path, {'name': 'S', 'url': 'https://s.example/', 'selector': 'a'})
+    plan = parser.site_plans['S']
+    parser.site_feeds['S'] = 'https://s.example/feed'
+
+    parser.feed_failed(plan, 'https://s.example/feed', 503)
+    parser.feed_failed(plan, 'https://s.example/feed')
+    assert parser.site_feeds['S'] == 'https://s.example/feed'
+    parser.feed_failed(plan, 'https://s.example/feed', 500)
+    assert parser.site_feeds['S'] is None
+    parser.seen_news.close()
+
+
+def test_configured_feed_is_kept(tmp_path):
+    site_config = {'name': 'S', 'url': 'https://s.example/', 'selector': 'a', 'feed_url': 'https://s.example/rss'}
+    parser = make_parser(tmp_path, site_config)
+    parser.feed_failed(parser.site_plans['S'], 'https://s.example/rss', 404)
+    assert 'S' not in parser.site_feeds
+    parser.seen_news.close()
+
+
+def publish(parser, site_name, articles):
+    # Як check_site_task: запам'ятовуємо новини й зберігаємо стан після публікації
+    new_articles = parser.collect_new_articles(site_name, len(articles), articles)
+    parser.save_state(site_name)
+    return [article['title'] for article in new_articles]
+
+
+def feed_items(titles, prefix):
+    return [{'site': 'S', 'title': title, 'link': f'https://s.example/{prefix}/{i}'} for i, title in enumerate(titles)]
+
+
+def test_switch_to_feed_does_not_resend_archive(tmp_path):
+    parser = make_parser(tmp_path, {'name': 'S', 'url': 'https://s.example/', 'selector': 'a'})
+    assert publish(parser, 'S', feed_items(['Ten', 'Nine'], 'html')) == ['Ten', 'Nine']
+    parser.switch_source('S', 'html')
+
+    # Стрічка без спільних заголовків: усе вважаємо архівом
+    assert parser.switch_source('S', 'feed')
+    archive = feed_items([f'Post {i}' for i in range(8, 0, -1)], 'feed')
+    assert parser.collect_switched('S', len(archive), archive) == []
+    parser.save_state('S')
+
+    # Назад на HTML: нове лише те, що вище за знайомий заголовок
+    assert parser.switch_source('S', 'html')
+    page = feed_items(['Fresh', 'Post 8', 'Ten'], 'page')
+    assert [article['title'] for article in parser.collect_switched('S', len(page), page)] == ['Fresh']
+    assert not parser.switch_source('S', 'html')
+    parser.seen_news.close()
+
+
+def test_first_source_of_new_site_is_not_a_switch(tmp_path):
+    parser = make_parser(tmp_path, {'name': 'S', 'url': 'https://s.example/', 'selector': 'a'})
+    assert not parser.switch_source('S', 'feed')
+    parser.seen_news.close()
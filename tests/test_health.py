@@ -0,0 +1,24 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from health import SiteHealth, OPEN, CLOSED
+
+
+def test_unchanged_page_keeps_empty_result():
+    health = SiteHealth(failure_threshold=1, empty_threshold=3)
+    health.record_success(found=False)
+    # Сторінка з тим самим порожнім результатом більше не розбирається
+    health.record_not_modified()
+    health.record_not_modified()
+    assert health.state == OPEN
+
+
+def test_unchanged_page_after_good_parse_is_success():
+    health = SiteHealth(failure_threshold=3, empty_threshold=3)
+    health.record_success(found=True)
+    health.record_failure('HTTP 500')
+    health.record_not_modified()
+    assert health.state == CLOSED
+    assert health.failures == 0
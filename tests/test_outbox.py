@@ -0,0 +1,24 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from outbox import Outbox, ArticleQueue
+
+
+def test_released_articles_are_taken_again(tmp_path):
+    db_path = str(tmp_path / 'outbox.db')
+    queue = ArticleQueue(db_path)
+    queue.push([{'site': 'S', 'title': f'Новина {i}', 'link': f'/{i}'} for i in range(5)])
+    outbox = Outbox(db_path)
+
+    assert len(outbox.take_incoming(3)) == 3
+    # Публікація не вдалася: статті мають повернутися в чергу
+    outbox.release_taken()
+    articles = outbox.take_incoming(10)
+    assert [article['title'] for article in articles] == [f'Новина {i}' for i in range(5)]
+
+    outbox.hold(articles)
+    assert outbox.take_incoming(10) == []
+    outbox.close()
+    queue.close()
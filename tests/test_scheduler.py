@@ -0,0 +1,21 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheduler import SiteScheduler
+
+
+def test_interval_does_not_grow_with_article_rate():
+    scheduler = SiteScheduler(300, min_interval=60, max_interval=3600)
+    intervals = [scheduler.interval_for({}, articles) for articles in range(0, 20000, 7)]
+    assert intervals == sorted(intervals, reverse=True)
+    assert intervals[0] == 3600
+    assert intervals[-1] == 60
+
+
+def test_site_without_history_gets_max_interval():
+    scheduler = SiteScheduler(300, min_interval=60, max_interval=3600)
+    assert scheduler.interval_for({}, 0) == 3600
+    assert scheduler.interval_for({'max_interval': 900}, 0) == 900
+    assert scheduler.interval_for({'check_interval': 120}, 0) == 120
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+
+import pytest
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from checking import NewsParser, check_site_task
+from scheduler import SiteScheduler
+from seen_store import JsonSeenNewsStore, SqliteSeenNewsStore
+
+
+def open_store(backend, tmp_path):
+    if backend == 'json':
+        return JsonSeenNewsStore(str(tmp_path / 'seen_news.json'))
+    return SqliteSeenNewsStore(str(tmp_path / 'seen_news.db'))
+
+
+def saved_ids(backend, tmp_path):
+    if backend == 'json':
+        with open(tmp_path / 'seen_news.json', encoding='utf-8') as f:
+            return set(json.load(f))
+    with sqlite3.connect(tmp_path / 'seen_news.db') as conn:
+        return {news_id for (news_id,) in conn.execute('SELECT news_id FROM seen_news')}
+
+
+@pytest.mark.parametrize('backend', ['json', 'sqlite'])
+def test_commit_saves_only_given_site(backend, tmp_path):
+    store = open_store(backend, tmp_path)
+    store.add('A:/1', 'A', 'A1', '/1')
+    store.add('B:/1', 'B', 'B1', '/1')
+    store.commit('B')
+
+    assert saved_ids(backend, tmp_path) == {'B:/1'}
+    # Незбережена новина все одно вважається побаченою в поточному процесі
+    assert 'A:/1' in store
+    assert store.get('A:/1')['title'] == 'A1'
+
+    store.commit()
+    assert saved_ids(backend, tmp_path) == {'A:/1', 'B:/1'}
+
+
+@pytest.mark.parametrize('backend', ['json', 'sqlite'])
+def test_close_drops_unpublished_news(backend, tmp_path):
+    store = open_store(backend, tmp_path)
+    store.add('A:/1', 'A', 'A1', '/1')
+    store.commit()
+    store.add('A:/2', 'A', 'A2', '/2')
+    store.close()
+    assert saved_ids(backend, tmp_path) == {'A:/1'}
+
+
+def test_save_state_keeps_other_sites_validators(tmp_path):
+    sites = [{'name': name, 'url': f'https://{name}.example/', 'selector': 'a'} for name in ('A', 'B')]
+    (tmp_path / 'sites_config.json').write_text(json.dumps(sites), encoding='utf-8')
+    parser = NewsParser(
+        sites_config_file=str(tmp_path / 'sites_config.json'),
+        seen_news_file=str(tmp_path / 'seen_news.json'),
+        seen_db_file=str(tmp_path / 'seen_news.db'),
+        validators_file=str(tmp_path / 'site_validators.json'),
+        feeds_file=str(tmp_path / 'site_feeds.json'),
+        parse_executor=None
+    )
+    for name in ('A', 'B'):
+        parser.site_validators[name] = {'url': f'https://{name}.example/', 'digest': name}
+        parser.seen_index.add(f'{name}:/1', name, f'{name}1', '/1')
+
+    parser.save_state('B')
+
+    with open(tmp_path / 'site_validators.json', encoding='utf-8') as f:
+        assert list(json.load(f)) == ['B']
+    assert saved_ids('sqlite', tmp_path) == {'B:/1'}
+    parser.seen_news.close()
+
+
+def test_failed_publish_is_retried(tmp_path):
+    async def page(request):
+        return web.Response(text='<div class="n"><a href="/1">Перша</a></div><div class="n"><a href="/2">Друга</a></div>',
+                            content_type='text/html', headers={'ETag': '"v1"'})
+
+    async def run():
+        app = web.Application()
+        app.router.add_get('/', page)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = runner.addresses[0][1]
+
+        sites = [{'name': 'S', 'url': f'http://127.0.0.1:{port}/', 'selector': 'div.n', 'source_type': 'html'}]
+        (tmp_path / 'sites_config.json').write_text(json.dumps(sites), encoding='utf-8')
+        parser = NewsParser(
+            sites_config_file=str(tmp_path / 'sites_config.json'),
+            seen_news_file=str(tmp_path / 'seen_news.json'),
+            seen_db_file=str(tmp_path / 'seen_news.db'),
+            validators_file=str(tmp_path / 'site_validators.json'),
+            feeds_file=str(tmp_path / 'site_feeds.json'),
+            parse_executor=None
+        )
+        published = []
+
+        def publish(articles):
+            if not published:
+                published.append(None)
+                raise RuntimeError('database is locked')
+            published.append([article['title'] for article in articles])
+
+        scheduler = SiteScheduler(300)
+        await check_site_task(parser, scheduler, 'S', publish)
+        assert saved_ids('sqlite', tmp_path) == set()
+        await check_site_task(parser, scheduler, 'S', publish)
+        await parser.close()
+        await runner.cleanup()
+        return published
+
+    assert asyncio.run(run()) == [None, ['Перша', 'Друга']]
+    assert len(saved_ids('sqlite', tmp_path)) == 2
+
+
+def test_json_migration_runs_once(tmp_path):
+    legacy = tmp_path / 'seen_news.json'
+    rows = {'A:/1': {'title': 'A1', 'link': '/1', 'first_seen': '2024-01-01T00:00:00'}}
+    legacy.write_text(json.dumps(rows), encoding='utf-8')
+    first = SqliteSeenNewsStore(str(tmp_path / 'seen_news.db'), legacy_json_file=str(legacy))
+    assert 'A:/1' in first
+    assert not legacy.exists()
+
+    # Інший воркер перевірив наявність файлу до того, як його перейменували
+    second = SqliteSeenNewsStore(str(tmp_path / 'seen_news.db'))
+    second.migrate_json(str(legacy))
+    legacy.write_text(json.dumps({'B:/1': {'title': 'B1', 'link': '/1'}}), encoding='utf-8')
+    second.migrate_json(str(legacy))
+    assert 'B:/1' not in second
+    first.close()
+    second.close()
@@ -0,0 +1,84 @@
+import asyncio
+import hmac
+import logging
+from aiohttp import web
+from aiogram import Bot, Dispatcher, types
+import metrics
+
+
+def update_chat_id(data):
+    """Чат або користувач, якого стосується оновлення (для збереження порядку його оновлень)."""
+    for value in data.values():
+        if isinstance(value, dict):
+            chat = value.get('chat') or (value.get('message') or {}).get('chat') or value.get('from')
+            if chat:
+                return chat.get('id', 0)
+    return 0
+
+
+# Прийом оновлень Telegram через вебхук. Відповідь Telegram надсилається одразу,
+# а обробка йде у воркерах з обмеженими чергами. Оновлення одного чату завжди потрапляють
+# до того самого воркера, тож кроки діалогу (FSM) обробляються по черзі.
+class WebhookServer:
+    def __init__(self, dispatcher, path='/webhook', secret=None, workers=16, queue_size=1000):
+        self.dispatcher = dispatcher
+        self.path = path
+        self.secret = secret
+        self.queues = [asyncio.Queue(maxsize=max(1, queue_size // workers)) for _ in range(workers)]
+        self.tasks = []
+        self.runner = None
+
+    async def handle(self, request):
+        if self.secret and not hmac.compare_digest(
+                request.headers.get('X-Telegram-Bot-Api-Secret-Token', ''), self.secret):
+            return web.Response(status=403)
+        try:
+            data = await request.json()
+        except ValueError:
+            return web.Response(status=400)
+
+        queue = self.queues[update_chat_id(data) % len(self.queues)]
+        try:
+            queue.put_nowait(data)
+        except asyncio.QueueFull:
+            # Telegram повторить оновлення пізніше, тож при перевантаженні просто відмовляємо
+            metrics.WEBHOOK_UPDATES.inc(status='rejected')
+            logging.debug("Черга вебхука переповнена, оновлення %s відхилено", data.get('update_id'))
+            return web.Response(status=503)
+        metrics.WEBHOOK_UPDATES.inc(status='accepted')
+        metrics.WEBHOOK_QUEUE.inc()
+        return web.Response()
+
+    async def worker(self, queue):
+        # Обробники використовують Bot.get_current() (message.answer тощо)
+        Bot.set_current(self.dispatcher.bot)
+        Dispatcher.set_current(self.dispatcher)
+        while True:
+            data = await queue.get()
+            metrics.WEBHOOK_QUEUE.inc(-1)
+            try:
+                await self.dispatcher.process_update(types.Update.to_object(data))
+            except Exception as e:
+                logging.error("Помилка обробки оновлення %s: %s", data.get('update_id'), e)
+            finally:
+                queue.task_done()
+
+    async def start(self, host, port):
+        app = web.Application()
+        app.router.add_post(self.path, self.handle)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, host, port).start()
+        self.tasks = [asyncio.create_task(self.worker(queue)) for queue in self.queues]
+        logging.info("Вебхук приймає оновлення на http://%s:%s%s", host, port, self.path)
+
+    async def stop(self, timeout=10):
+        if self.runner is not None:
+            await self.runner.cleanup()
+        # Даємо воркерам обробити вже прийняті оновлення
+        try:
+            await asyncio.wait_for(asyncio.gather(*(queue.join() for queue in self.queues)), timeout)
+        except asyncio.TimeoutError:
+            logging.warning("Не всі прийняті оновлення оброблено до зупинки")
+        for task in self.tasks:
+            task.cancel()